@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import String, Text, Boolean, DateTime, Integer, Float, JSON, ForeignKey
+from sqlalchemy import String, Text, Boolean, DateTime, Integer, BigInteger, Float, JSON, ForeignKey, UniqueConstraint, Index, Computed, func, literal_column
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 import os
@@ -58,17 +59,36 @@ class RSSSource(Base):
     url: Mapped[str] = mapped_column(Text, nullable=False)
     description: Mapped[Optional[str]] = mapped_column(Text)
     source_type: Mapped[str] = mapped_column(String(50), default="web")
-    site_name: Mapped[Optional[str]] = mapped_column(String(255))
+    site_name: Mapped[Optional[str]] = mapped_column(String(255), index=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     fetch_interval: Mapped[int] = mapped_column(Integer, default=3600)  # seconds
+    adaptive_interval: Mapped[Optional[int]] = mapped_column(Integer)  # seconds, tuned by the scheduler
     last_fetched: Mapped[Optional[datetime]] = mapped_column(DateTime)
     last_error: Mapped[Optional[str]] = mapped_column(Text)
     total_items: Mapped[int] = mapped_column(Integer, default=0)
+    
+    # HTTP validators for conditional GET
+    etag: Mapped[Optional[str]] = mapped_column(String(500))
+    last_modified: Mapped[Optional[str]] = mapped_column(String(100))
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64))  # sha256 of last body
+    recent_guids: Mapped[Optional[List[str]]] = mapped_column(JSON)  # newest guids seen, for incremental parsing
+    
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+# Text search configuration: "simple" (no stemming) because feeds mix languages
+SEARCH_CONFIG = "simple"
+SEARCH_VECTOR_EXPRESSION = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', left(coalesce(content, ''), 100000)), 'C')"
+)
+
 class RSSItem(Base):
     __tablename__ = "rss_items"
+    __table_args__ = (
+        UniqueConstraint("source_id", "guid", name="uq_rss_items_source_guid"),
+    )
     
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
     source_id: Mapped[str] = mapped_column(String, ForeignKey("rss_sources.id", ondelete="CASCADE"))
@@ -80,6 +100,15 @@ class RSSItem(Base):
     author: Mapped[Optional[str]] = mapped_column(String(255))
     published_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
     
+    # Full-text search document, maintained by Postgres on every insert/update
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True), deferred=True
+    )
+    
+    # Near-duplicate clustering (SimHash of title + description)
+    simhash: Mapped[Optional[int]] = mapped_column(BigInteger)
+    cluster_id: Mapped[Optional[str]] = mapped_column(String, index=True)  # id of the first item of the story
+    
     # AI-generated fields
     ai_summary: Mapped[Optional[str]] = mapped_column(Text)
     ai_topic: Mapped[Optional[str]] = mapped_column(String(100))
@@ -88,6 +117,8 @@ class RSSItem(Base):
     ai_sentiment: Mapped[Optional[str]] = mapped_column(String(20))  # positive, negative, neutral
     ai_importance_score: Mapped[Optional[float]] = mapped_column(Float)  # 0.0 to 1.0
     ai_processing_status: Mapped[str] = mapped_column(String(20), default="pending")  # pending, processing, completed, failed
+    ai_lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime)  # worker lease while "processing"; retry not-before while "pending"
+    ai_attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     ai_processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
     ai_api_used: Mapped[Optional[str]] = mapped_column(String(100))
     
@@ -95,16 +126,65 @@ class RSSItem(Base):
     is_read: Mapped[bool] = mapped_column(Boolean, default=False)
     is_bookmarked: Mapped[bool] = mapped_column(Boolean, default=False)
     
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+# Sort keys of the item listings (keyset pagination); NULLs sort last.
+# The -1.0 is rendered inline so queries match the expression indexes below.
+item_importance_key = func.coalesce(RSSItem.ai_importance_score, literal_column("-1.0"))
+item_recency_key = func.coalesce(RSSItem.published_at, RSSItem.created_at)
+
+# Timeline and topic pages: importance, then recency
+Index(
+    "ix_rss_items_importance_keyset",
+    item_importance_key.desc(), item_recency_key.desc(), RSSItem.created_at.desc(), RSSItem.id.desc()
+)
+Index(
+    "ix_rss_items_topic_keyset",
+    RSSItem.ai_topic, item_importance_key.desc(), item_recency_key.desc(), RSSItem.created_at.desc(), RSSItem.id.desc()
+)
+Index(
+    "ix_rss_items_subtopic_keyset",
+    RSSItem.ai_subtopic, item_importance_key.desc(), item_recency_key.desc(), RSSItem.created_at.desc(), RSSItem.id.desc()
+)
+# Site and source pages: recency per source
+Index(
+    "ix_rss_items_source_keyset",
+    RSSItem.source_id, item_recency_key.desc(), RSSItem.created_at.desc(), RSSItem.id.desc()
+)
+
+# AI worker queue: claim_items scans pending/processing items by created_at
+Index(
+    "ix_rss_items_ai_queue",
+    RSSItem.created_at,
+    postgresql_where=RSSItem.ai_processing_status.in_(["pending", "processing"])
+)
+# Recent counts per topic/subtopic (topic stats, trending)
+Index("ix_rss_items_topic_created", RSSItem.ai_topic, RSSItem.created_at)
+Index("ix_rss_items_subtopic_created", RSSItem.ai_subtopic, RSSItem.created_at)
+# Timeline bookmarked_only
+Index("ix_rss_items_bookmarked", RSSItem.created_at, postgresql_where=RSSItem.is_bookmarked == True)
+# Search candidates (newest matches first) and recency-only listings
+Index("ix_rss_items_recency", item_recency_key.desc(), RSSItem.id.desc())
+# Search: full-text on the stored tsvector, trigram for the topic/site substring filters (ilike '%...%')
+Index("ix_rss_items_search_vector", RSSItem.search_vector, postgresql_using="gin")
+Index("ix_rss_items_ai_topic_trgm", RSSItem.ai_topic, postgresql_using="gin", postgresql_ops={"ai_topic": "gin_trgm_ops"})
+Index(
+    "ix_rss_items_ai_subtopic_trgm", RSSItem.ai_subtopic,
+    postgresql_using="gin", postgresql_ops={"ai_subtopic": "gin_trgm_ops"}
+)
+Index(
+    "ix_rss_sources_site_name_trgm", RSSSource.site_name,
+    postgresql_using="gin", postgresql_ops={"site_name": "gin_trgm_ops"}
+)
+
 class Topic(Base):
     __tablename__ = "topics"
     
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
     name: Mapped[str] = mapped_column(String(100), nullable=False, unique=True)
     description: Mapped[Optional[str]] = mapped_column(Text)
-    parent_topic_id: Mapped[Optional[str]] = mapped_column(String, ForeignKey("topics.id", ondelete="CASCADE"))
+    parent_topic_id: Mapped[Optional[str]] = mapped_column(String, ForeignKey("topics.id", ondelete="CASCADE"), index=True)
     color: Mapped[Optional[str]] = mapped_column(String(7))  # hex color
     icon: Mapped[Optional[str]] = mapped_column(String(50))
     item_count: Mapped[int] = mapped_column(Integer, default=0)
@@ -112,6 +192,33 @@ class Topic(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class TopicStat(Base):
+    """Rollup of categorized items per topic/subtopic name and sentiment, kept up to date by the AI worker"""
+    __tablename__ = "topic_stats"
+    
+    scope: Mapped[str] = mapped_column(String(10), primary_key=True)  # topic (ai_topic) or subtopic (ai_subtopic)
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    sentiment: Mapped[str] = mapped_column(String(20), primary_key=True)  # "unknown" when the item has none
+    item_count: Mapped[int] = mapped_column(Integer, default=0)
+    importance_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    importance_count: Mapped[int] = mapped_column(Integer, default=0)
+
+class CategorizationCacheEntry(Base):
+    __tablename__ = "ai_categorization_cache"
+    
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)  # sha256 of normalized title/description/content
+    result: Mapped[Dict[str, Any]] = mapped_column(JSON, nullable=False)
+    api_used: Mapped[Optional[str]] = mapped_column(String(100))
+    hit_count: Mapped[int] = mapped_column(Integer, default=0)
+    last_hit_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+# Cache pruning: entries by last use
+Index(
+    "ix_ai_categorization_cache_last_used",
+    func.coalesce(CategorizationCacheEntry.last_hit_at, CategorizationCacheEntry.created_at)
+)
+
 # Dependency to get database session
 async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session:
@@ -120,7 +227,26 @@ async def get_db() -> AsyncSession:
         finally:
             await session.close()
 
+# Alembic owns the schema (backend/migrations)
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+BASELINE_REVISION = "0001"
+
+def _run_migrations(connection):
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import inspect
+    
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "migrations"))
+    config.attributes["connection"] = connection
+    
+    tables = inspect(connection).get_table_names()
+    if "alembic_version" not in tables and "rss_items" in tables:
+        # Database created by the old create_all: already at the baseline
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+
 # Initialize database
 async def init_db():
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(_run_migrations)
\ No newline at end of file
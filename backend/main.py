@@ -1,17 +1,21 @@
+import time
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
-from fastapi.cors import CORSMiddleware
+from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import Response
 from contextlib import asynccontextmanager
 from pydantic import BaseModel
-import asyncio
 import httpx
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db, init_db
+from services.pagination import NEXT_CURSOR_HEADER
 from routers import rss, ai_apis, feeds, topics
-from services.rss_processor import RSSProcessor
-from services.ai_manager import AIManager
+from services.registry import ServiceRegistry
+from services.startup import StartupTimer, print_import_report
 import logging
+import sys
 from datetime import datetime
 
 # Configure logging
@@ -22,31 +26,25 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting AI Feed RSS application...")
-    await init_db()
-    
-    # Start background RSS processing task
-    rss_processor = RSSProcessor()
-    ai_manager = AIManager()
-    
-    # Create background task for RSS processing
-    async def process_rss_feeds():
-        while True:
-            try:
-                await rss_processor.process_all_feeds()
-                await asyncio.sleep(300)  # Process every 5 minutes
-            except Exception as e:
-                logger.error(f"Error in RSS processing: {e}")
-                await asyncio.sleep(60)  # Wait 1 minute on error
+    with startup_timer.phase("init_db"):
+        await init_db()
     
-    # Start background task
-    task = asyncio.create_task(process_rss_feeds())
+    # Shared services: one instance of each per process, routers get them via Depends
+    with startup_timer.phase("services"):
+        services = ServiceRegistry()
+        app.state.services = services
+        await services.start()
+    startup_timer.mark_ready()
     
     yield
     
     # Shutdown
-    task.cancel()
+    await services.shutdown()
     logger.info("Shutting down AI Feed RSS application...")
 
+# Module imports are the first startup phase; lifespan phases are added as they run
+startup_timer = StartupTimer(import_seconds=time.perf_counter() - _import_started)
+
 app = FastAPI(
     title="AI Feed RSS",
     description="Intelligent RSS Feed Management with AI-powered organization",
@@ -61,6 +59,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.add_middleware(
@@ -102,6 +101,11 @@ async def health_check():
         }
     }
 
+@app.get("/health/startup")
+async def startup_report():
+    """Time spent in each startup phase and whether imports stayed within budget"""
+    return startup_timer.get_stats()
+
 # RSS Proxy endpoint to bypass CORS
 class FeedRequest(BaseModel):
     url: str
@@ -139,5 +143,8 @@ async def rss_proxy(request: FeedRequest):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    if "--import-report" in sys.argv:
+        print_import_report()
+    else:
+        import uvicorn
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,50 @@
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy.engine import Connection
+
+from database import Base, engine
+
+config = context.config
+target_metadata = Base.metadata
+
+# Quando init_db aplica as migrações, a conexão vem pronta e o logging do app é mantido
+embedded_connection = config.attributes.get("connection")
+
+if embedded_connection is None and config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+
+def run_migrations_offline() -> None:
+    """Gerar o SQL sem conectar (alembic upgrade head --sql)"""
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata)
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+        await connection.commit()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+elif embedded_connection is not None:
+    do_run_migrations(embedded_connection)
+else:
+    asyncio.run(run_async_migrations())
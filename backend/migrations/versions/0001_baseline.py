@@ -0,0 +1,107 @@
+"""baseline: schema criado por Base.metadata.create_all antes das migrações
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 00:00:00
+
+Bancos criados pelo create_all antigo são marcados (stamp) nesta revisão por
+init_db e seguem direto para as próximas.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ai_api_providers",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("api_type", sa.String(50), nullable=False),
+        sa.Column("api_key", sa.String(500), nullable=False),
+        sa.Column("base_url", sa.String(500)),
+        sa.Column("model_name", sa.String(100), nullable=False),
+        sa.Column("priority", sa.Integer()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("max_requests_per_minute", sa.Integer()),
+        sa.Column("current_requests", sa.Integer()),
+        sa.Column("last_request_time", sa.DateTime()),
+        sa.Column("success_rate", sa.Float()),
+        sa.Column("total_requests", sa.Integer()),
+        sa.Column("failed_requests", sa.Integer()),
+        sa.Column("config", sa.JSON()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "rss_sources",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("url", sa.Text(), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("source_type", sa.String(50)),
+        sa.Column("site_name", sa.String(255)),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("fetch_interval", sa.Integer()),
+        sa.Column("last_fetched", sa.DateTime()),
+        sa.Column("last_error", sa.Text()),
+        sa.Column("total_items", sa.Integer()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "rss_items",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("source_id", sa.String(), sa.ForeignKey("rss_sources.id", ondelete="CASCADE")),
+        sa.Column("title", sa.Text(), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("content", sa.Text()),
+        sa.Column("url", sa.Text(), nullable=False),
+        sa.Column("guid", sa.String(500)),
+        sa.Column("author", sa.String(255)),
+        sa.Column("published_at", sa.DateTime()),
+        sa.Column("ai_summary", sa.Text()),
+        sa.Column("ai_topic", sa.String(100)),
+        sa.Column("ai_subtopic", sa.String(100)),
+        sa.Column("ai_tags", sa.JSON()),
+        sa.Column("ai_sentiment", sa.String(20)),
+        sa.Column("ai_importance_score", sa.Float()),
+        sa.Column("ai_processing_status", sa.String(20)),
+        sa.Column("ai_processed_at", sa.DateTime()),
+        sa.Column("ai_api_used", sa.String(100)),
+        sa.Column("is_read", sa.Boolean()),
+        sa.Column("is_bookmarked", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "topics",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False, unique=True),
+        sa.Column("description", sa.Text()),
+        sa.Column("parent_topic_id", sa.String(), sa.ForeignKey("topics.id", ondelete="CASCADE")),
+        sa.Column("color", sa.String(7)),
+        sa.Column("icon", sa.String(50)),
+        sa.Column("item_count", sa.Integer()),
+        sa.Column("is_ai_generated", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("topics")
+    op.drop_table("rss_items")
+    op.drop_table("rss_sources")
+    op.drop_table("ai_api_providers")
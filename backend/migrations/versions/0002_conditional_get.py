@@ -0,0 +1,35 @@
+"""GET condicional dos feeds (user-001): ETag, Last-Modified e hash do corpo
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 00:00:01
+
+Idempotente (IF NOT EXISTS): bancos antigos podem já ter parte disto,
+criada pelo create_all.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = [
+    ("etag", "VARCHAR(500)"),
+    ("last_modified", "VARCHAR(100)"),
+    ("content_hash", "VARCHAR(64)"),
+]
+
+
+def upgrade() -> None:
+    for column, column_type in COLUMNS:
+        op.execute(f"ALTER TABLE rss_sources ADD COLUMN IF NOT EXISTS {column} {column_type}")
+
+
+def downgrade() -> None:
+    for column, _ in reversed(COLUMNS):
+        op.drop_column("rss_sources", column)
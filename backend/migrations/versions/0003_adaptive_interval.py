@@ -0,0 +1,27 @@
+"""agendamento adaptativo por source (user-002)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 00:00:02
+
+Idempotente (IF NOT EXISTS): bancos antigos podem já ter parte disto,
+criada pelo create_all.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE rss_sources ADD COLUMN IF NOT EXISTS adaptive_interval INTEGER")
+
+
+def downgrade() -> None:
+    op.drop_column("rss_sources", "adaptive_interval")
@@ -0,0 +1,40 @@
+"""unicidade de (source_id, guid) para a inserção em lote (user-003)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 00:00:03
+
+Idempotente (IF NOT EXISTS): bancos antigos podem já ter parte disto,
+criada pelo create_all.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Deduplicar (source_id, guid), mantendo o item mais antigo, antes da constraint
+    op.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_rss_items_source_guid') THEN
+                DELETE FROM rss_items a
+                USING rss_items b
+                WHERE a.source_id = b.source_id
+                  AND a.guid = b.guid
+                  AND (coalesce(a.created_at, 'epoch'), a.id) > (coalesce(b.created_at, 'epoch'), b.id);
+                ALTER TABLE rss_items ADD CONSTRAINT uq_rss_items_source_guid UNIQUE (source_id, guid);
+            END IF;
+        END $$;
+    """)
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_rss_items_source_guid", "rss_items", type_="unique")
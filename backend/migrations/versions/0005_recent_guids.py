@@ -0,0 +1,27 @@
+"""guids recentes por source para o parsing incremental (user-005)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16 00:00:04
+
+Idempotente (IF NOT EXISTS): bancos antigos podem já ter parte disto,
+criada pelo create_all.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE rss_sources ADD COLUMN IF NOT EXISTS recent_guids JSON")
+
+
+def downgrade() -> None:
+    op.drop_column("rss_sources", "recent_guids")
@@ -0,0 +1,43 @@
+"""fila durável de categorização (user-008): lease, tentativas e índice da fila
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16 00:00:05
+
+Idempotente (IF NOT EXISTS): bancos antigos podem já ter parte disto,
+criada pelo create_all.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE rss_items ADD COLUMN IF NOT EXISTS ai_lease_expires_at TIMESTAMP WITHOUT TIME ZONE")
+    op.execute("ALTER TABLE rss_items ADD COLUMN IF NOT EXISTS ai_attempts INTEGER NOT NULL DEFAULT 0")
+
+    # ai_attempts pode já existir sem default (create_all); claim_items faz ai_attempts + 1
+    op.execute("UPDATE rss_items SET ai_attempts = 0 WHERE ai_attempts IS NULL")
+    op.execute(
+        "ALTER TABLE rss_items ALTER COLUMN ai_attempts SET DEFAULT 0, "
+        "ALTER COLUMN ai_attempts SET NOT NULL"
+    )
+
+    op.create_index(
+        "ix_rss_items_ai_queue", "rss_items", [sa.text("created_at")], if_not_exists=True,
+        postgresql_where=sa.text("ai_processing_status IN ('pending', 'processing')")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_rss_items_ai_queue", table_name="rss_items", if_exists=True)
+    op.drop_column("rss_items", "ai_attempts")
+    op.drop_column("rss_items", "ai_lease_expires_at")
@@ -0,0 +1,41 @@
+"""cache de categorização por hash do conteúdo (user-011)
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-16 00:00:06
+
+Idempotente (IF NOT EXISTS): bancos antigos podem já ter parte disto,
+criada pelo create_all.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS ai_categorization_cache (
+            content_hash VARCHAR(64) PRIMARY KEY,
+            result JSON NOT NULL,
+            api_used VARCHAR(100),
+            hit_count INTEGER,
+            last_hit_at TIMESTAMP WITHOUT TIME ZONE,
+            created_at TIMESTAMP WITHOUT TIME ZONE
+        )
+    """)
+    op.create_index(
+        "ix_ai_categorization_cache_last_used", "ai_categorization_cache",
+        [sa.text("coalesce(last_hit_at, created_at)")], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ai_categorization_cache")
@@ -0,0 +1,31 @@
+"""agrupamento de histórias quase duplicadas (user-012): SimHash e cluster
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-16 00:00:07
+
+Idempotente (IF NOT EXISTS): bancos antigos podem já ter parte disto,
+criada pelo create_all.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE rss_items ADD COLUMN IF NOT EXISTS simhash BIGINT")
+    op.execute("ALTER TABLE rss_items ADD COLUMN IF NOT EXISTS cluster_id VARCHAR")
+    op.create_index("ix_rss_items_cluster_id", "rss_items", ["cluster_id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_rss_items_cluster_id", table_name="rss_items", if_exists=True)
+    op.drop_column("rss_items", "cluster_id")
+    op.drop_column("rss_items", "simhash")
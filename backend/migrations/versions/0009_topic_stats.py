@@ -0,0 +1,37 @@
+"""rollup topic_stats mantido incrementalmente (user-020)
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-16 00:00:08
+
+Idempotente (IF NOT EXISTS): bancos antigos podem já ter parte disto,
+criada pelo create_all.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS topic_stats (
+            scope VARCHAR(10) NOT NULL,
+            name VARCHAR(100) NOT NULL,
+            sentiment VARCHAR(20) NOT NULL,
+            item_count INTEGER,
+            importance_sum FLOAT,
+            importance_count INTEGER,
+            PRIMARY KEY (scope, name, sentiment)
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("topic_stats")
@@ -0,0 +1,80 @@
+"""índices das consultas dos routers/workers (user-024)
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-16 00:00:09
+
+As colunas e tabelas novas de cada pedido anterior têm a própria revisão
+(0002-0009). Idempotente (IF NOT EXISTS): bancos antigos podem já ter
+parte disto, criada pelo create_all ou por deploys anteriores.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+IMPORTANCE_KEY = "coalesce(ai_importance_score, -1.0) DESC"
+RECENCY_KEY = "coalesce(published_at, created_at) DESC"
+
+# (nome, tabela, colunas, where do índice parcial)
+INDEXES = [
+    ("ix_rss_sources_site_name", "rss_sources", ["site_name"], None),
+    ("ix_topics_parent_topic_id", "topics", ["parent_topic_id"], None),
+    ("ix_rss_items_created_at", "rss_items", ["created_at"], None),
+    ("ix_rss_items_topic_created", "rss_items", ["ai_topic", "created_at"], None),
+    ("ix_rss_items_subtopic_created", "rss_items", ["ai_subtopic", "created_at"], None),
+    ("ix_rss_items_bookmarked", "rss_items", ["created_at"], "is_bookmarked = true"),
+    (
+        "ix_rss_items_importance_keyset", "rss_items",
+        [IMPORTANCE_KEY, RECENCY_KEY, "created_at DESC", "id DESC"], None
+    ),
+    (
+        "ix_rss_items_topic_keyset", "rss_items",
+        ["ai_topic", IMPORTANCE_KEY, RECENCY_KEY, "created_at DESC", "id DESC"], None
+    ),
+    (
+        "ix_rss_items_subtopic_keyset", "rss_items",
+        ["ai_subtopic", IMPORTANCE_KEY, RECENCY_KEY, "created_at DESC", "id DESC"], None
+    ),
+    (
+        "ix_rss_items_source_keyset", "rss_items",
+        ["source_id", RECENCY_KEY, "created_at DESC", "id DESC"], None
+    ),
+]
+
+# Índices do antigo database/init.sql sobre colunas que o ORM não usa
+LEGACY_INDEXES = [
+    "idx_rss_items_ai_category",
+    "idx_rss_items_ai_score",
+    "idx_rss_items_is_read",
+    "idx_rss_items_is_bookmarked",
+    "idx_rss_items_published_at",
+    "idx_rss_items_title_fts",
+    "idx_rss_items_description_fts",
+]
+
+
+def upgrade() -> None:
+    for name in LEGACY_INDEXES:
+        op.drop_index(name, table_name="rss_items", if_exists=True)
+
+    for name, table, columns, where in INDEXES:
+        op.create_index(
+            name,
+            table,
+            [sa.text(column) for column in columns],
+            if_not_exists=True,
+            postgresql_where=sa.text(where) if where else None,
+        )
+
+
+def downgrade() -> None:
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,66 @@
+"""busca: tsvector armazenado com índice GIN, índices trigram dos filtros de tópico/site
+e índice de recência dos candidatos
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-16 00:00:10
+
+Adicionar a coluna gerada reescreve rss_items (uma vez, no deploy).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Igual a database.SEARCH_VECTOR_EXPRESSION no momento desta revisão
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('simple', left(coalesce(content, ''), 100000)), 'C')"
+)
+
+TRIGRAM_INDEXES = [
+    ("ix_rss_items_ai_topic_trgm", "rss_items", "ai_topic"),
+    ("ix_rss_items_ai_subtopic_trgm", "rss_items", "ai_subtopic"),
+    ("ix_rss_sources_site_name_trgm", "rss_sources", "site_name"),
+]
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.execute(
+        "ALTER TABLE rss_items ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR_EXPRESSION}) STORED"
+    )
+    op.create_index(
+        "ix_rss_items_search_vector", "rss_items", ["search_vector"],
+        postgresql_using="gin", if_not_exists=True
+    )
+
+    op.create_index(
+        "ix_rss_items_recency", "rss_items",
+        [sa.text("coalesce(published_at, created_at) DESC"), sa.text("id DESC")],
+        if_not_exists=True
+    )
+
+    for name, table, column in TRIGRAM_INDEXES:
+        op.create_index(
+            name, table, [sa.text(f"{column} gin_trgm_ops")],
+            postgresql_using="gin", if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(TRIGRAM_INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
+    op.drop_index("ix_rss_items_recency", table_name="rss_items", if_exists=True)
+    op.drop_index("ix_rss_items_search_vector", table_name="rss_items", if_exists=True)
+    op.drop_column("rss_items", "search_vector")
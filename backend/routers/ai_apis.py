@@ -5,6 +5,8 @@ from database import get_db, AIApiProvider
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from services.ai_manager import AIManager
+from services.categorization_cache import CategorizationCache
+from services.registry import get_ai_manager, get_categorization_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,7 +16,7 @@ router = APIRouter()
 # Pydantic models
 class AIApiCreate(BaseModel):
     name: str = Field(..., description="Nome da API (ex: OpenAI GPT-4)")
-    api_type: str = Field(..., description="Tipo da API: openai, huggingface, anthropic, groq, etc")
+    api_type: str = Field(..., description="Tipo da API: openai, huggingface, anthropic, groq, local, etc")
     api_key: str = Field(..., description="Chave da API")
     base_url: Optional[str] = Field(None, description="URL base customizada (opcional)")
     model_name: str = Field(..., description="Nome do modelo (ex: gpt-4, claude-3, etc)")
@@ -79,7 +81,11 @@ async def get_ai_apis(db: AsyncSession = Depends(get_db)):
     ) for api in apis]
 
 @router.post("/", response_model=AIApiResponse)
-async def add_ai_api(api_data: AIApiCreate, db: AsyncSession = Depends(get_db)):
+async def add_ai_api(
+    api_data: AIApiCreate,
+    db: AsyncSession = Depends(get_db),
+    ai_manager: AIManager = Depends(get_ai_manager)
+):
     """Adicionar nova API de IA"""
     
     # Check if name already exists
@@ -104,9 +110,9 @@ async def add_ai_api(api_data: AIApiCreate, db: AsyncSession = Depends(get_db)):
     db.add(new_api)
     await db.commit()
     await db.refresh(new_api)
+    await ai_manager.invalidate_provider(new_api.id)
     
     # Test the API
-    ai_manager = AIManager()
     try:
         test_result = await ai_manager.test_api(new_api.id)
         logger.info(f"API {new_api.name} tested successfully: {test_result}")
@@ -135,7 +141,8 @@ async def add_ai_api(api_data: AIApiCreate, db: AsyncSession = Depends(get_db)):
 async def update_ai_api(
     api_id: str, 
     api_data: AIApiUpdate, 
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    ai_manager: AIManager = Depends(get_ai_manager)
 ):
     """Atualizar API de IA existente"""
     
@@ -152,6 +159,7 @@ async def update_ai_api(
     
     await db.commit()
     await db.refresh(api)
+    await ai_manager.invalidate_provider(api_id)
     
     return AIApiResponse(
         id=api.id,
@@ -172,7 +180,11 @@ async def update_ai_api(
     )
 
 @router.delete("/{api_id}")
-async def delete_ai_api(api_id: str, db: AsyncSession = Depends(get_db)):
+async def delete_ai_api(
+    api_id: str,
+    db: AsyncSession = Depends(get_db),
+    ai_manager: AIManager = Depends(get_ai_manager)
+):
     """Deletar API de IA"""
     
     result = await db.execute(select(AIApiProvider).where(AIApiProvider.id == api_id))
@@ -183,11 +195,18 @@ async def delete_ai_api(api_id: str, db: AsyncSession = Depends(get_db)):
     
     await db.execute(delete(AIApiProvider).where(AIApiProvider.id == api_id))
     await db.commit()
+    ai_manager.rate_limiter.remove(api_id)
+    ai_manager.health.remove(api_id)
+    await ai_manager.invalidate_provider(api_id)
     
     return {"message": f"API '{api.name}' deletada com sucesso"}
 
 @router.post("/{api_id}/toggle")
-async def toggle_ai_api(api_id: str, db: AsyncSession = Depends(get_db)):
+async def toggle_ai_api(
+    api_id: str,
+    db: AsyncSession = Depends(get_db),
+    ai_manager: AIManager = Depends(get_ai_manager)
+):
     """Ativar/desativar API de IA"""
     
     result = await db.execute(select(AIApiProvider).where(AIApiProvider.id == api_id))
@@ -198,12 +217,17 @@ async def toggle_ai_api(api_id: str, db: AsyncSession = Depends(get_db)):
     
     api.is_active = not api.is_active
     await db.commit()
+    await ai_manager.invalidate_provider(api_id)
     
     status = "ativada" if api.is_active else "desativada"
     return {"message": f"API '{api.name}' {status}"}
 
 @router.post("/{api_id}/test")
-async def test_ai_api(api_id: str, db: AsyncSession = Depends(get_db)):
+async def test_ai_api(
+    api_id: str,
+    db: AsyncSession = Depends(get_db),
+    ai_manager: AIManager = Depends(get_ai_manager)
+):
     """Testar API de IA"""
     
     result = await db.execute(select(AIApiProvider).where(AIApiProvider.id == api_id))
@@ -212,7 +236,6 @@ async def test_ai_api(api_id: str, db: AsyncSession = Depends(get_db)):
     if not api:
         raise HTTPException(status_code=404, detail="API não encontrada")
     
-    ai_manager = AIManager()
     try:
         test_result = await ai_manager.test_api(api_id)
         return {
@@ -229,7 +252,11 @@ async def test_ai_api(api_id: str, db: AsyncSession = Depends(get_db)):
         }
 
 @router.get("/status")
-async def get_apis_status(db: AsyncSession = Depends(get_db)):
+async def get_apis_status(
+    db: AsyncSession = Depends(get_db),
+    ai_manager: AIManager = Depends(get_ai_manager),
+    categorization_cache: CategorizationCache = Depends(get_categorization_cache)
+):
     """Obter status de todas as APIs"""
     
     result = await db.execute(select(AIApiProvider))
@@ -243,6 +270,9 @@ async def get_apis_status(db: AsyncSession = Depends(get_db)):
     total_failed = sum(api.failed_requests for api in apis)
     overall_success_rate = (total_requests - total_failed) / total_requests if total_requests > 0 else 1.0
     
+    # Live in-memory state: EWMA latency/error rate and circuit breaker per provider
+    health = ai_manager.health.get_stats()
+    
     return {
         "total_apis": total_apis,
         "active_apis": active_apis,
@@ -250,6 +280,10 @@ async def get_apis_status(db: AsyncSession = Depends(get_db)):
         "overall_success_rate": round(overall_success_rate, 3),
         "total_requests": total_requests,
         "total_failed_requests": total_failed,
+        "categorization": ai_manager.get_categorization_stats(),
+        "categorization_cache": categorization_cache.get_stats(),
+        "clients": ai_manager.clients.get_stats(),
+        "hedging": ai_manager.get_hedging_stats(),
         "apis": [
             {
                 "id": api.id,
@@ -257,7 +291,8 @@ async def get_apis_status(db: AsyncSession = Depends(get_db)):
                 "api_type": api.api_type,
                 "is_active": api.is_active,
                 "success_rate": api.success_rate,
-                "priority": api.priority
+                "priority": api.priority,
+                "health": health.get(api.id)
             }
             for api in sorted(apis, key=lambda x: x.priority)
         ]
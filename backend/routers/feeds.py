@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, desc
-from database import get_db, RSSItem, RSSSource, Topic
+from sqlalchemy.orm import aliased
+from sqlalchemy import select, or_, func, desc, literal
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from database import get_db, RSSItem, RSSSource, Topic, SEARCH_CONFIG, item_recency_key
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
+import os
+from services.topic_tree import build_topic_tree
+from services.pagination import IMPORTANCE_KEYSET, RECENCY_KEYSET, NEXT_CURSOR_HEADER
 
 router = APIRouter()
 
+# Resultados mais recentes considerados pelo ranking da busca
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "2000"))
+
 class FeedItemResponse(BaseModel):
     id: str
     title: str
@@ -26,6 +34,12 @@ class FeedItemResponse(BaseModel):
     source_name: str
     site_name: Optional[str]
     created_at: str
+    cluster_id: Optional[str] = None
+    cluster_size: int = 1
+
+class SearchResultResponse(FeedItemResponse):
+    rank: float
+    headline: Optional[str]  # trecho com os termos entre <mark></mark>
 
 class TopicResponse(BaseModel):
     id: str
@@ -52,45 +66,11 @@ async def get_feeds_by_topics(
 ):
     """Visualização organizada por tópicos e subtópicos gerados pela IA"""
     
-    # Get main topics (without parent)
-    main_topics_result = await db.execute(
-        select(Topic)
-        .where(Topic.parent_topic_id.is_(None))
-        .order_by(desc(Topic.item_count), Topic.name)
-    )
-    main_topics = main_topics_result.scalars().all()
-    
-    response = []
-    
-    for topic in main_topics:
-        if not include_empty and topic.item_count == 0:
-            continue
-            
-        # Get subtopics
-        subtopics_result = await db.execute(
-            select(Topic)
-            .where(Topic.parent_topic_id == topic.id)
-            .order_by(desc(Topic.item_count), Topic.name)
-        )
-        subtopics = subtopics_result.scalars().all()
-        
-        subtopics_list = []
-        for subtopic in subtopics:
-            if not include_empty and subtopic.item_count == 0:
-                continue
-                
-            subtopics_list.append(TopicResponse(
-                id=subtopic.id,
-                name=subtopic.name,
-                description=subtopic.description,
-                parent_topic_id=subtopic.parent_topic_id,
-                color=subtopic.color,
-                icon=subtopic.icon,
-                item_count=subtopic.item_count,
-                subtopics=[]
-            ))
-        
-        response.append(TopicResponse(
+    result = await db.execute(select(Topic).order_by(desc(Topic.item_count), Topic.name))
+    
+    return build_topic_tree(
+        result.scalars().all(),
+        lambda topic, subtopics: TopicResponse(
             id=topic.id,
             name=topic.name,
             description=topic.description,
@@ -98,16 +78,18 @@ async def get_feeds_by_topics(
             color=topic.color,
             icon=topic.icon,
             item_count=topic.item_count,
-            subtopics=subtopics_list
-        ))
-    
-    return response
+            subtopics=subtopics
+        ),
+        include=None if include_empty else lambda topic: topic.item_count > 0
+    )
 
 @router.get("/by-topics/{topic_id}/items", response_model=List[FeedItemResponse])
 async def get_topic_items(
     topic_id: str,
+    response: Response,
     limit: int = Query(50, le=200),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (cabeçalho X-Next-Cursor); substitui offset"),
     sentiment: Optional[str] = Query(None, regex="^(positive|negative|neutral)$"),
     min_importance: Optional[float] = Query(None, ge=0.0, le=1.0),
     db: AsyncSession = Depends(get_db)
@@ -147,17 +129,17 @@ async def get_topic_items(
     if min_importance is not None:
         query = query.where(RSSItem.ai_importance_score >= min_importance)
     
-    # Order and paginate
-    query = (
-        query
-        .order_by(desc(RSSItem.ai_importance_score), desc(RSSItem.published_at), desc(RSSItem.created_at))
-        .offset(offset)
-        .limit(limit)
-    )
+    # Order and paginate (keyset when a cursor is given, offset otherwise)
+    query = query.order_by(*IMPORTANCE_KEYSET.order_by()).limit(limit)
+    query = query.where(IMPORTANCE_KEYSET.after(cursor)) if cursor else query.offset(offset)
     
     result = await db.execute(query)
     items_with_sources = result.all()
     
+    next_cursor = IMPORTANCE_KEYSET.next_cursor([item for item, _, _ in items_with_sources], limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
     return [
         FeedItemResponse(
             id=item.id,
@@ -186,51 +168,47 @@ async def get_topic_items(
 async def get_feeds_by_sites(db: AsyncSession = Depends(get_db)):
     """Visualização organizada por site/fonte"""
     
-    # Get site statistics
+    # Recent items (last 24 hours) per source: only the index range on created_at is read
+    recent = (
+        select(RSSItem.source_id, func.count(RSSItem.id).label("recent_items"))
+        .where(RSSItem.created_at >= datetime.utcnow() - timedelta(days=1))
+        .group_by(RSSItem.source_id)
+        .subquery()
+    )
+    
+    # Site statistics in a single grouped query (total_items is maintained per source)
     result = await db.execute(
         select(
             RSSSource.site_name,
             func.count(RSSSource.id).label("source_count"),
-            func.sum(RSSSource.total_items).label("total_items"),
+            func.coalesce(func.sum(RSSSource.total_items), 0).label("total_items"),
+            func.coalesce(func.sum(recent.c.recent_items), 0).label("recent_items"),
             func.max(RSSSource.last_fetched).label("last_updated")
         )
+        .outerjoin(recent, recent.c.source_id == RSSSource.id)
         .where(RSSSource.site_name.is_not(None))
         .group_by(RSSSource.site_name)
         .order_by(desc("total_items"))
     )
     
-    sites_data = result.all()
-    response = []
-    
-    for site_name, source_count, total_items, last_updated in sites_data:
-        # Count recent items (last 24 hours)
-        recent_result = await db.execute(
-            select(func.count(RSSItem.id))
-            .join(RSSSource, RSSItem.source_id == RSSSource.id)
-            .where(
-                and_(
-                    RSSSource.site_name == site_name,
-                    RSSItem.created_at >= datetime.utcnow() - timedelta(days=1)
-                )
-            )
-        )
-        recent_items = recent_result.scalar() or 0
-        
-        response.append(SiteResponse(
+    return [
+        SiteResponse(
             site_name=site_name,
             source_count=source_count,
-            total_items=total_items or 0,
-            recent_items=recent_items,
+            total_items=int(total_items),
+            recent_items=int(recent_items),
             last_updated=last_updated.isoformat() if last_updated else None
-        ))
-    
-    return response
+        )
+        for site_name, source_count, total_items, recent_items, last_updated in result.all()
+    ]
 
 @router.get("/by-sites/{site_name}/items", response_model=List[FeedItemResponse])
 async def get_site_items(
     site_name: str,
+    response: Response,
     limit: int = Query(50, le=200),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (cabeçalho X-Next-Cursor); substitui offset"),
     source_id: Optional[str] = Query(None, description="Filtrar por source específico"),
     db: AsyncSession = Depends(get_db)
 ):
@@ -247,17 +225,17 @@ async def get_site_items(
     if source_id:
         query = query.where(RSSSource.id == source_id)
     
-    # Order and paginate
-    query = (
-        query
-        .order_by(desc(RSSItem.published_at), desc(RSSItem.created_at))
-        .offset(offset)
-        .limit(limit)
-    )
+    # Order and paginate (keyset when a cursor is given, offset otherwise)
+    query = query.order_by(*RECENCY_KEYSET.order_by()).limit(limit)
+    query = query.where(RECENCY_KEYSET.after(cursor)) if cursor else query.offset(offset)
     
     result = await db.execute(query)
     items_with_sources = result.all()
     
+    next_cursor = RECENCY_KEYSET.next_cursor([item for item, _, _ in items_with_sources], limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
     return [
         FeedItemResponse(
             id=item.id,
@@ -305,68 +283,202 @@ async def get_site_sources(site_name: str, db: AsyncSession = Depends(get_db)):
         for source in sources
     ]
 
+def _filter_items(
+    query,
+    topic: Optional[str],
+    site: Optional[str],
+    sentiment: Optional[str],
+    min_importance: Optional[float],
+    unread_only: bool,
+    bookmarked_only: bool,
+    item=RSSItem,
+    source=RSSSource
+):
+    """Filtros comuns da timeline e da busca (topic/site por substring usam os índices trigram).
+    
+    `item`/`source` permitem aplicar os mesmos filtros a aliases (subconsultas de cluster).
+    """
+    if topic:
+        query = query.where(
+            or_(
+                item.ai_topic.ilike(f"%{topic}%"),
+                item.ai_subtopic.ilike(f"%{topic}%")
+            )
+        )
+    
+    if site:
+        query = query.where(source.site_name.ilike(f"%{site}%"))
+    
+    if sentiment:
+        query = query.where(item.ai_sentiment == sentiment)
+    
+    if min_importance is not None:
+        query = query.where(item.ai_importance_score >= min_importance)
+    
+    if unread_only:
+        query = query.where(item.is_read == False)
+    
+    if bookmarked_only:
+        query = query.where(item.is_bookmarked == True)
+    
+    return query
+
 # Modo 3: Lista Geral (Timeline)
 @router.get("/timeline", response_model=List[FeedItemResponse])
 async def get_feeds_timeline(
+    response: Response,
     limit: int = Query(50, le=200),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (cabeçalho X-Next-Cursor); substitui offset"),
     topic: Optional[str] = Query(None, description="Filtrar por tópico"),
     site: Optional[str] = Query(None, description="Filtrar por site"),
     sentiment: Optional[str] = Query(None, regex="^(positive|negative|neutral)$"),
     min_importance: Optional[float] = Query(None, ge=0.0, le=1.0),
     unread_only: bool = Query(False, description="Apenas itens não lidos"),
     bookmarked_only: bool = Query(False, description="Apenas itens marcados"),
+    collapse_clusters: bool = Query(False, description="Mostrar uma linha por história (itens quase duplicados)"),
     db: AsyncSession = Depends(get_db)
 ):
     """Timeline geral de feeds com filtros opcionais"""
     
-    # Build query
-    query = (
-        select(RSSItem, RSSSource.name.label("source_name"), RSSSource.site_name)
-        .join(RSSSource, RSSItem.source_id == RSSSource.id)
-    )
-    
-    # Apply filters
-    if topic:
-        query = query.where(
-            or_(
-                RSSItem.ai_topic.ilike(f"%{topic}%"),
-                RSSItem.ai_subtopic.ilike(f"%{topic}%")
-            )
+    filters = (topic, site, sentiment, min_importance, unread_only, bookmarked_only)
+    
+    if collapse_clusters:
+        # One row per cluster: an item is shown only if no better-ranked item of its
+        # cluster passes the same filters (per-row lookups on ix_rss_items_cluster_id,
+        # so only the rows walked by the keyset/limit are checked)
+        other = aliased(RSSItem)
+        other_source = aliased(RSSSource)
+        members = select(other.id).where(other.cluster_id == RSSItem.cluster_id)
+        if site:
+            members = members.join(other_source, other.source_id == other_source.id)
+        members = _filter_items(members, *filters, item=other, source=other_source)
+        cluster_size = func.greatest(
+            members.with_only_columns(func.count(other.id)).scalar_subquery(), 1
+        )
+        query = (
+            select(RSSItem, RSSSource.name.label("source_name"), RSSSource.site_name, cluster_size.label("cluster_size"))
+            .join(RSSSource, RSSItem.source_id == RSSSource.id)
+            .where(~members.where(IMPORTANCE_KEYSET.ranked_before(other)).exists())
+        )
+    else:
+        query = (
+            select(RSSItem, RSSSource.name.label("source_name"), RSSSource.site_name, literal(1).label("cluster_size"))
+            .join(RSSSource, RSSItem.source_id == RSSSource.id)
         )
     
-    if site:
-        query = query.where(RSSSource.site_name.ilike(f"%{site}%"))
+    query = _filter_items(query, *filters)
     
-    if sentiment:
-        query = query.where(RSSItem.ai_sentiment == sentiment)
+    # Order by importance and recency (keyset when a cursor is given, offset otherwise)
+    query = query.order_by(*IMPORTANCE_KEYSET.order_by()).limit(limit)
+    query = query.where(IMPORTANCE_KEYSET.after(cursor)) if cursor else query.offset(offset)
     
-    if min_importance is not None:
-        query = query.where(RSSItem.ai_importance_score >= min_importance)
+    result = await db.execute(query)
+    items_with_sources = result.all()
     
-    if unread_only:
-        query = query.where(RSSItem.is_read == False)
+    next_cursor = IMPORTANCE_KEYSET.next_cursor([item for item, _, _, _ in items_with_sources], limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
-    if bookmarked_only:
-        query = query.where(RSSItem.is_bookmarked == True)
+    return [
+        FeedItemResponse(
+            id=item.id,
+            title=item.title,
+            description=item.description,
+            url=item.url,
+            author=item.author,
+            published_at=item.published_at.isoformat() if item.published_at else None,
+            ai_summary=item.ai_summary,
+            ai_topic=item.ai_topic,
+            ai_subtopic=item.ai_subtopic,
+            ai_tags=item.ai_tags,
+            ai_sentiment=item.ai_sentiment,
+            ai_importance_score=item.ai_importance_score,
+            is_read=item.is_read,
+            is_bookmarked=item.is_bookmarked,
+            source_name=source_name,
+            site_name=site_name,
+            created_at=item.created_at.isoformat(),
+            cluster_id=item.cluster_id,
+            cluster_size=cluster_size
+        )
+        for item, source_name, site_name, cluster_size in items_with_sources
+    ]
+
+# Busca textual
+@router.get("/search", response_model=List[SearchResultResponse])
+async def search_feeds(
+    q: str = Query(..., min_length=1, max_length=200, description="Termos de busca (aceita \"frase\", OR e -exclusão)"),
+    sort: str = Query("relevance", regex="^(relevance|recent)$"),
+    limit: int = Query(50, le=200),
+    offset: int = Query(0, ge=0, le=SEARCH_MAX_CANDIDATES),
+    topic: Optional[str] = Query(None, description="Filtrar por tópico"),
+    site: Optional[str] = Query(None, description="Filtrar por site"),
+    sentiment: Optional[str] = Query(None, regex="^(positive|negative|neutral)$"),
+    min_importance: Optional[float] = Query(None, ge=0.0, le=1.0),
+    unread_only: bool = Query(False, description="Apenas itens não lidos"),
+    bookmarked_only: bool = Query(False, description="Apenas itens marcados"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Busca full-text em título, descrição e conteúdo, com ranking e destaque.
+    
+    O ranking por relevância é aproximado quando há mais de SEARCH_MAX_CANDIDATES
+    (2000) resultados: só os SEARCH_MAX_CANDIDATES mais recentes são ranqueados, e
+    um resultado mais antigo e mais relevante fica de fora. Em troca, o custo não
+    cresce com o número de resultados: para termos comuns o planner percorre
+    ix_rss_items_recency (mesma ordem dos candidatos) filtrando por search_vector
+    e para no LIMIT; para termos raros usa o GIN e ordena os poucos resultados.
+    """
+    
+    config = literal(SEARCH_CONFIG, type_=REGCONFIG)
+    tsquery = func.websearch_to_tsquery(config, q)
+    
+    # Newest matches first, bounded: same ORDER BY as ix_rss_items_recency so the
+    # scan can stop at the LIMIT; rss_sources only joins when filtering by site
+    candidates = (
+        select(RSSItem.id, RSSItem.search_vector, item_recency_key.label("recency"))
+        .where(RSSItem.search_vector.op("@@")(tsquery))
+    )
+    if site:
+        candidates = candidates.join(RSSSource, RSSItem.source_id == RSSSource.id)
+    candidates = _filter_items(candidates, topic, site, sentiment, min_importance, unread_only, bookmarked_only)
+    candidates = (
+        candidates
+        .order_by(desc(item_recency_key), desc(RSSItem.id))
+        .limit(SEARCH_MAX_CANDIDATES)
+        .subquery()
+    )
     
-    # Order by importance and recency
+    # Rank the candidates and keep one page
+    rank = func.ts_rank_cd(candidates.c.search_vector, tsquery)
+    page = select(candidates.c.id, candidates.c.recency, rank.label("rank"))
+    if sort == "relevance":
+        page = page.order_by(desc("rank"), desc(candidates.c.recency), desc(candidates.c.id))
+    else:
+        page = page.order_by(desc(candidates.c.recency), desc(candidates.c.id))
+    page = page.offset(offset).limit(limit).subquery()
+    
+    # Headlines only for the returned page (ts_headline re-parses the text)
+    headline = func.ts_headline(
+        config,
+        func.coalesce(RSSItem.description, RSSItem.title),
+        tsquery,
+        "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=30, MinWords=10"
+    )
     query = (
-        query
-        .order_by(
-            desc(RSSItem.ai_importance_score),
-            desc(RSSItem.published_at),
-            desc(RSSItem.created_at)
-        )
-        .offset(offset)
-        .limit(limit)
+        select(RSSItem, RSSSource.name.label("source_name"), RSSSource.site_name, page.c.rank, headline.label("headline"))
+        .join(page, page.c.id == RSSItem.id)
+        .join(RSSSource, RSSItem.source_id == RSSSource.id)
     )
+    if sort == "relevance":
+        query = query.order_by(desc(page.c.rank), desc(page.c.recency), desc(page.c.id))
+    else:
+        query = query.order_by(desc(page.c.recency), desc(page.c.id))
     
     result = await db.execute(query)
-    items_with_sources = result.all()
     
     return [
-        FeedItemResponse(
+        SearchResultResponse(
             id=item.id,
             title=item.title,
             description=item.description,
@@ -383,9 +495,12 @@ async def get_feeds_timeline(
             is_bookmarked=item.is_bookmarked,
             source_name=source_name,
             site_name=site_name,
-            created_at=item.created_at.isoformat()
+            created_at=item.created_at.isoformat(),
+            cluster_id=item.cluster_id,
+            rank=round(rank_value or 0.0, 4),
+            headline=headline_text
         )
-        for item, source_name, site_name in items_with_sources
+        for item, source_name, site_name, rank_value, headline_text in result.all()
     ]
 
 # Actions for items
@@ -5,7 +5,11 @@ from database import get_db, RSSSource, RSSItem
 from pydantic import BaseModel, HttpUrl
 from typing import List, Optional
 from services.rss_processor import RSSProcessor
-from services.ai_manager import AIManager
+from services.feed_scheduler import FeedScheduler
+from services.ai_worker import AIWorkerPool
+from services.registry import get_rss_processor, get_feed_scheduler, get_ai_worker
+from services.topic_stats import remove_source_items
+from services.pagination import RECENCY_KEYSET
 import logging
 
 logger = logging.getLogger(__name__)
@@ -64,8 +68,8 @@ async def get_rss_sources(db: AsyncSession = Depends(get_db)):
 @router.post("/sources", response_model=RSSSourceResponse)
 async def add_rss_source(
     source_data: RSSSourceCreate,
-    background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    feed_scheduler: FeedScheduler = Depends(get_feed_scheduler)
 ):
     """Add a new RSS source and immediately process it"""
     
@@ -89,9 +93,8 @@ async def add_rss_source(
     await db.commit()
     await db.refresh(new_source)
     
-    # Process the RSS feed immediately in background
-    rss_processor = RSSProcessor()
-    background_tasks.add_task(rss_processor.process_source, new_source.id)
+    # Process the RSS feed immediately; the scheduler keeps polling it afterwards
+    feed_scheduler.schedule_now(new_source.id, interval=new_source.fetch_interval, url=new_source.url)
     
     return RSSSourceResponse(
         id=new_source.id,
@@ -109,7 +112,11 @@ async def add_rss_source(
     )
 
 @router.delete("/sources/{source_id}")
-async def delete_rss_source(source_id: str, db: AsyncSession = Depends(get_db)):
+async def delete_rss_source(
+    source_id: str,
+    db: AsyncSession = Depends(get_db),
+    feed_scheduler: FeedScheduler = Depends(get_feed_scheduler)
+):
     """Delete an RSS source and all its items"""
     
     # Check if source exists
@@ -120,13 +127,19 @@ async def delete_rss_source(source_id: str, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=404, detail="RSS source not found")
     
     # Delete the source (items will be deleted due to CASCADE)
+    await remove_source_items(db, source_id)
     await db.execute(delete(RSSSource).where(RSSSource.id == source_id))
     await db.commit()
+    feed_scheduler.unschedule(source_id)
     
     return {"message": f"RSS source '{source.name}' deleted successfully"}
 
 @router.post("/sources/{source_id}/toggle")
-async def toggle_rss_source(source_id: str, db: AsyncSession = Depends(get_db)):
+async def toggle_rss_source(
+    source_id: str,
+    db: AsyncSession = Depends(get_db),
+    feed_scheduler: FeedScheduler = Depends(get_feed_scheduler)
+):
     """Toggle RSS source active status"""
     
     result = await db.execute(select(RSSSource).where(RSSSource.id == source_id))
@@ -138,6 +151,11 @@ async def toggle_rss_source(source_id: str, db: AsyncSession = Depends(get_db)):
     source.is_active = not source.is_active
     await db.commit()
     
+    if source.is_active:
+        feed_scheduler.schedule_now(source.id, interval=source.adaptive_interval or source.fetch_interval, url=source.url)
+    else:
+        feed_scheduler.unschedule(source.id)
+    
     status = "activated" if source.is_active else "deactivated"
     return {"message": f"RSS source '{source.name}' {status}"}
 
@@ -145,12 +163,11 @@ async def toggle_rss_source(source_id: str, db: AsyncSession = Depends(get_db)):
 async def process_rss_feeds(
     request: RSSProcessRequest,
     background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    rss_processor: RSSProcessor = Depends(get_rss_processor)
 ):
     """Manually trigger RSS processing for specific sources or all sources"""
     
-    rss_processor = RSSProcessor()
-    
     if request.source_ids:
         # Process specific sources
         for source_id in request.source_ids:
@@ -171,14 +188,27 @@ async def process_rss_feeds(
         background_tasks.add_task(rss_processor.process_all_feeds)
         return {"message": "Processing started for all active RSS sources"}
 
+@router.get("/stats")
+async def get_rss_stats(
+    rss_processor: RSSProcessor = Depends(get_rss_processor),
+    feed_scheduler: FeedScheduler = Depends(get_feed_scheduler),
+    ai_worker: AIWorkerPool = Depends(get_ai_worker)
+):
+    """Get RSS processing statistics, including time spent fetching vs parsing"""
+    stats = await rss_processor.get_processing_stats()
+    stats["scheduler"] = feed_scheduler.get_stats()
+    stats["ai_queue"] = await ai_worker.get_stats()
+    return stats
+
 @router.get("/sources/{source_id}/items")
 async def get_source_items(
     source_id: str,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get RSS items from a specific source"""
+    """Get RSS items from a specific source (pass pagination.next_cursor as cursor for the next page)"""
     
     # Verify source exists
     result = await db.execute(select(RSSSource).where(RSSSource.id == source_id))
@@ -187,14 +217,15 @@ async def get_source_items(
     if not source:
         raise HTTPException(status_code=404, detail="RSS source not found")
     
-    # Get items
-    result = await db.execute(
+    # Get items (keyset when a cursor is given, offset otherwise)
+    query = (
         select(RSSItem)
         .where(RSSItem.source_id == source_id)
-        .order_by(RSSItem.published_at.desc().nullslast(), RSSItem.created_at.desc())
-        .offset(offset)
+        .order_by(*RECENCY_KEYSET.order_by())
         .limit(limit)
     )
+    query = query.where(RECENCY_KEYSET.after(cursor)) if cursor else query.offset(offset)
+    result = await db.execute(query)
     items = result.scalars().all()
     
     return {
@@ -227,6 +258,7 @@ async def get_source_items(
         "pagination": {
             "offset": offset,
             "limit": limit,
-            "total": len(items)
+            "total": len(items),
+            "next_cursor": RECENCY_KEYSET.next_cursor(items, limit)
         }
     }
\ No newline at end of file
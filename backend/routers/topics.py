@@ -5,6 +5,8 @@ from database import get_db, Topic, RSSItem
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from datetime import datetime, timedelta
+from services.topic_stats import topic_stats_query, rebuild_topic_stats
+from services.topic_tree import build_topic_tree
 
 router = APIRouter()
 
@@ -33,68 +35,17 @@ async def get_all_topics(
     min_items: int = 0,
     db: AsyncSession = Depends(get_db)
 ):
-    """Obter todos os tópicos com estatísticas"""
+    """Obter todos os tópicos com estatísticas (rollup topic_stats, uma única consulta)"""
     
-    query = select(Topic)
+    query = topic_stats_query()
     
     if not include_empty:
         query = query.where(Topic.item_count > min_items)
     
     result = await db.execute(query.order_by(desc(Topic.item_count), Topic.name))
-    topics = result.scalars().all()
     
-    topic_stats = []
-    
-    for topic in topics:
-        # Get recent items count (last 24 hours)
-        recent_query = select(func.count(RSSItem.id))
-        
-        if topic.parent_topic_id is None:
-            # Main topic - count items from topic and subtopics
-            recent_query = recent_query.where(
-                and_(
-                    RSSItem.ai_topic == topic.name,
-                    RSSItem.created_at >= datetime.utcnow() - timedelta(days=1)
-                )
-            )
-        else:
-            # Subtopic
-            recent_query = recent_query.where(
-                and_(
-                    RSSItem.ai_subtopic == topic.name,
-                    RSSItem.created_at >= datetime.utcnow() - timedelta(days=1)
-                )
-            )
-        
-        recent_result = await db.execute(recent_query)
-        recent_items = recent_result.scalar() or 0
-        
-        # Get average importance score
-        importance_query = select(func.avg(RSSItem.ai_importance_score))
-        
-        if topic.parent_topic_id is None:
-            importance_query = importance_query.where(RSSItem.ai_topic == topic.name)
-        else:
-            importance_query = importance_query.where(RSSItem.ai_subtopic == topic.name)
-        
-        importance_result = await db.execute(importance_query)
-        avg_importance = importance_result.scalar() or 0.0
-        
-        # Get sentiment distribution
-        sentiment_query = (
-            select(RSSItem.ai_sentiment, func.count(RSSItem.id))
-            .group_by(RSSItem.ai_sentiment)
-        )
-        
-        if topic.parent_topic_id is None:
-            sentiment_query = sentiment_query.where(RSSItem.ai_topic == topic.name)
-        else:
-            sentiment_query = sentiment_query.where(RSSItem.ai_subtopic == topic.name)
-        
-        sentiment_result = await db.execute(sentiment_query)
-        sentiment_distribution = dict(sentiment_result.all())
-        
-        topic_stats.append(TopicStats(
+    topic_stats = [
+        TopicStats(
             id=topic.id,
             name=topic.name,
             description=topic.description,
@@ -102,47 +53,37 @@ async def get_all_topics(
             item_count=topic.item_count,
             recent_items=recent_items,
             avg_importance=round(avg_importance, 3),
-            sentiment_distribution=sentiment_distribution,
+            sentiment_distribution=sentiment_distribution or {},
             color=topic.color,
             icon=topic.icon,
             is_ai_generated=topic.is_ai_generated
-        ))
+        )
+        for topic, recent_items, avg_importance, sentiment_distribution in result.all()
+    ]
     
     return topic_stats
 
+@router.post("/stats/rebuild")
+async def rebuild_stats(db: AsyncSession = Depends(get_db)):
+    """Recalcular o rollup topic_stats a partir de rss_items"""
+    await rebuild_topic_stats(db)
+    await db.commit()
+    return {"message": "Estatísticas de tópicos recalculadas"}
+
 @router.get("/hierarchy", response_model=List[TopicHierarchy])
 async def get_topic_hierarchy(db: AsyncSession = Depends(get_db)):
     """Obter hierarquia completa de tópicos"""
     
-    # Get all topics
     result = await db.execute(select(Topic).order_by(Topic.name))
-    all_topics = result.scalars().all()
-    
-    # Build hierarchy
-    topics_dict = {topic.id: topic for topic in all_topics}
-    hierarchy = []
     
-    # Find root topics (no parent)
-    for topic in all_topics:
-        if topic.parent_topic_id is None:
-            hierarchy.append(_build_topic_hierarchy(topic, topics_dict))
-    
-    return hierarchy
-
-def _build_topic_hierarchy(topic: Topic, topics_dict: Dict[str, Topic]) -> TopicHierarchy:
-    """Construir hierarquia recursivamente"""
-    children = []
-    
-    # Find children
-    for child_topic in topics_dict.values():
-        if child_topic.parent_topic_id == topic.id:
-            children.append(_build_topic_hierarchy(child_topic, topics_dict))
-    
-    return TopicHierarchy(
-        id=topic.id,
-        name=topic.name,
-        item_count=topic.item_count,
-        children=children
+    return build_topic_tree(
+        result.scalars().all(),
+        lambda topic, children: TopicHierarchy(
+            id=topic.id,
+            name=topic.name,
+            item_count=topic.item_count,
+            children=children
+        )
     )
 
 @router.get("/trending")
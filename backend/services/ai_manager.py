@@ -2,87 +2,197 @@ import asyncio
 import json
 import logging
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import select, update, cast, func, Float
 from database import AsyncSessionLocal, AIApiProvider
-import aiohttp
-import openai
-from transformers import pipeline
+from services.local_classifier import (
+    LOCAL_CONFIDENCE_THRESHOLD,
+    LocalClassifier,
+    is_local_api
+)
+from services.provider_clients import ProviderClientCache
+from services.provider_health import ProviderHealth
+from services.rate_limiter import ProviderRateLimiter
 import random
+import os
+import time
 
 logger = logging.getLogger(__name__)
 
+# Intervalo (segundos) entre gravações em lote das estatísticas das APIs
+AI_STATS_FLUSH_INTERVAL = int(os.getenv("AI_STATS_FLUSH_INTERVAL", "15"))
+
+# Requisições acumuladas que antecipam o flush (picos de tráfego)
+AI_STATS_FLUSH_THRESHOLD = int(os.getenv("AI_STATS_FLUSH_THRESHOLD", "500"))
+
+# Itens por chamada de categorização em lote (sobrescrito por config["batch_size"] do provedor)
+AI_BATCH_SIZE = int(os.getenv("AI_BATCH_SIZE", "5"))
+AI_BATCH_TOKENS_PER_ITEM = 300
+
+# Segundos entre recargas da lista de provedores ativos (mudanças via API invalidam na hora)
+AI_PROVIDER_REFRESH = int(os.getenv("AI_PROVIDER_REFRESH", "60"))
+
+# Hedge: se o provedor passar do próprio p90, disparar também o próximo provedor
+AI_HEDGING_ENABLED = os.getenv("AI_HEDGING_ENABLED", "0") == "1"
+
+
+class HedgeFailed(Exception):
+    """Provedor principal (e hedge, se disparado) falharam; next_index é o próximo provedor não tentado"""
+
+    def __init__(self, error: BaseException, next_index: int):
+        self.error = error
+        self.next_index = next_index
+        super().__init__(str(error))
+
+
 class AIManager:
     """Gerenciador de múltiplas APIs de IA com sistema de fallback automático"""
     
     def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.clients = ProviderClientCache()
         self.rate_limit_reset_time = {}
+        self.rate_limiter = ProviderRateLimiter()
+        self._pending_stats: Dict[str, Dict[str, Any]] = {}
+        self._pending_requests = 0
+        self._flush_requested = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self.local_classifier = LocalClassifier()
+        self.health = ProviderHealth()
+        self._providers: Optional[List[AIApiProvider]] = None
+        self._providers_loaded_at = 0.0
+        self.hedging_enabled = AI_HEDGING_ENABLED
+        self.hedging_stats = {"hedged": 0, "hedge_wins": 0, "primary_wins": 0, "no_candidate": 0}
+        self.categorization_stats = {
+            mode: {"calls": 0, "items": 0, "tokens": 0, "seconds": 0.0}
+            for mode in ("single", "batch", "local")
+        }
         
-    async def get_session(self) -> aiohttp.ClientSession:
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
-        return self.session
-    
     async def close(self):
-        if self.session and not self.session.closed:
-            await self.session.close()
+        await self.clients.close_all()
     
     async def get_available_apis(self) -> List[AIApiProvider]:
-        """Obter APIs disponíveis ordenadas por prioridade e taxa de sucesso"""
-        async with AsyncSessionLocal() as db:
-            result = await db.execute(
-                select(AIApiProvider)
-                .where(AIApiProvider.is_active == True)
-                .order_by(AIApiProvider.priority, AIApiProvider.success_rate.desc())
-            )
-            return result.scalars().all()
-    
-    async def can_make_request(self, api: AIApiProvider) -> bool:
-        """Verificar se a API pode fazer uma requisição (rate limiting)"""
-        now = datetime.utcnow()
-        
-        # Reset rate limit counter if minute has passed
-        if api.last_request_time and (now - api.last_request_time).total_seconds() >= 60:
+        """APIs ativas, da lista em memória (recarregada a cada AI_PROVIDER_REFRESH ou após invalidação)"""
+        if self._providers is None or time.monotonic() - self._providers_loaded_at >= AI_PROVIDER_REFRESH:
             async with AsyncSessionLocal() as db:
-                await db.execute(
-                    update(AIApiProvider)
-                    .where(AIApiProvider.id == api.id)
-                    .values(current_requests=0, last_request_time=now)
+                result = await db.execute(
+                    select(AIApiProvider)
+                    .where(AIApiProvider.is_active == True)
+                    .order_by(AIApiProvider.priority, AIApiProvider.success_rate.desc())
                 )
-                await db.commit()
-            api.current_requests = 0
-            api.last_request_time = now
-        
-        return api.current_requests < api.max_requests_per_minute
+                self._providers = list(result.scalars().all())
+                self._providers_loaded_at = time.monotonic()
+        return self._providers
+    
+    async def invalidate_provider(self, api_id: str):
+        """Provedor criado, alterado, ativado/desativado ou removido: recarregar lista e cliente"""
+        self._providers = None
+        await self.clients.invalidate(api_id)
+    
+    async def can_make_request(self, api: AIApiProvider) -> bool:
+        """Verificar se a API pode fazer uma requisição (token bucket em memória, sem ida ao banco)"""
+        return self.rate_limiter.try_acquire(api.id, api.max_requests_per_minute)
+    
+    async def acquire_provider(self, api: AIApiProvider) -> bool:
+        """Circuit breaker e rate limit: o provedor pode receber esta requisição agora?"""
+        if not self.health.allow_request(api.id):
+            return False
+        if not await self.can_make_request(api):
+            logger.warning(f"Rate limit exceeded for API {api.name}, skipping...")
+            self.health.release_probe(api.id)
+            return False
+        return True
     
     async def update_api_stats(self, api_id: str, success: bool):
-        """Atualizar estatísticas da API após uma requisição"""
-        async with AsyncSessionLocal() as db:
-            api_result = await db.execute(select(AIApiProvider).where(AIApiProvider.id == api_id))
-            api = api_result.scalar_one_or_none()
+        """Acumular estatísticas da API em memória; gravadas em lote por flush_api_stats"""
+        stats = self._pending_stats.setdefault(api_id, {"requests": 0, "failed": 0, "last_request_time": None})
+        stats["requests"] += 1
+        if not success:
+            stats["failed"] += 1
+        stats["last_request_time"] = datetime.utcnow()
+        
+        self._pending_requests += 1
+        if self._pending_requests >= AI_STATS_FLUSH_THRESHOLD:
+            self._flush_requested.set()
+    
+    def _merge_pending(self, pending: Dict[str, Dict[str, Any]]):
+        """Devolver deltas não gravados ao acumulador (flush falhou)"""
+        for api_id, stats in pending.items():
+            current = self._pending_stats.setdefault(api_id, {"requests": 0, "failed": 0, "last_request_time": None})
+            current["requests"] += stats["requests"]
+            current["failed"] += stats["failed"]
+            current["last_request_time"] = max(
+                filter(None, [current["last_request_time"], stats["last_request_time"]]),
+                default=None
+            )
+            self._pending_requests += stats["requests"]
+    
+    async def flush_api_stats(self):
+        """Gravar no banco, em uma única transação, os contadores acumulados desde o último flush.
+        
+        Só deltas aditivos (total_requests = total_requests + n), então vários processos
+        podem gravar ao mesmo tempo sem perder incrementos; as linhas são atualizadas
+        sempre na mesma ordem (por id) para não haver deadlock entre transações.
+        """
+        async with self._flush_lock:
+            if not self._pending_stats:
+                return
+            
+            pending, self._pending_stats = self._pending_stats, {}
+            self._pending_requests = 0
             
-            if api:
-                api.total_requests += 1
-                api.current_requests += 1
-                api.last_request_time = datetime.utcnow()
-                
-                if not success:
-                    api.failed_requests += 1
-                
-                # Recalculate success rate
-                api.success_rate = (api.total_requests - api.failed_requests) / api.total_requests
-                
-                await db.commit()
+            try:
+                async with AsyncSessionLocal() as db:
+                    for api_id in sorted(pending):
+                        stats = pending[api_id]
+                        total = AIApiProvider.total_requests + stats["requests"]
+                        failed = AIApiProvider.failed_requests + stats["failed"]
+                        await db.execute(
+                            update(AIApiProvider)
+                            .where(AIApiProvider.id == api_id)
+                            .values(
+                                total_requests=total,
+                                failed_requests=failed,
+                                current_requests=self.rate_limiter.used(api_id),
+                                last_request_time=func.greatest(
+                                    func.coalesce(AIApiProvider.last_request_time, stats["last_request_time"]),
+                                    stats["last_request_time"]
+                                ),
+                                success_rate=cast(total - failed, Float) / total,
+                                # Estatística não é mudança de configuração (updated_at versiona os clientes)
+                                updated_at=AIApiProvider.updated_at
+                            )
+                            .execution_options(synchronize_session=False)
+                        )
+                    await db.commit()
+            except BaseException:
+                self._merge_pending(pending)
+                raise
     
-    async def call_openai_api(self, api: AIApiProvider, prompt: str) -> str:
+    async def run_stats_flusher(self):
+        """Loop de fundo que grava as estatísticas a cada intervalo ou ao atingir AI_STATS_FLUSH_THRESHOLD"""
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=AI_STATS_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush_api_stats()
+            except Exception as e:
+                logger.error(f"Erro ao gravar estatísticas das APIs: {e}")
+    
+    async def call_openai_api(
+        self,
+        api: AIApiProvider,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        usage: Optional[Dict[str, int]] = None
+    ) -> str:
         """Chamar API da OpenAI"""
         try:
-            client = openai.AsyncOpenAI(
-                api_key=api.api_key,
-                base_url=api.base_url
-            )
+            # Cached per provider; the SDK itself is imported on first use
+            client = await self.clients.get_openai_client(api)
             
             response = await client.chat.completions.create(
                 model=api.model_name,
@@ -90,20 +200,28 @@ class AIManager:
                     {"role": "system", "content": "Você é um assistente especializado em análise e categorização de conteúdo RSS. Seja preciso e conciso."},
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=api.config.get("max_tokens", 500) if api.config else 500,
+                max_tokens=max_tokens or (api.config.get("max_tokens", 500) if api.config else 500),
                 temperature=api.config.get("temperature", 0.7) if api.config else 0.7
             )
             
-            return response.choices[0].message.content.strip()
+            text = response.choices[0].message.content.strip()
+            self._record_usage(usage, response.usage.total_tokens if response.usage else None, prompt, text)
+            return text
             
         except Exception as e:
             logger.error(f"OpenAI API error: {e}")
             raise
     
-    async def call_huggingface_api(self, api: AIApiProvider, prompt: str) -> str:
+    async def call_huggingface_api(
+        self,
+        api: AIApiProvider,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        usage: Optional[Dict[str, int]] = None
+    ) -> str:
         """Chamar API da Hugging Face"""
         try:
-            session = await self.get_session()
+            session = await self.clients.get_session(api)
             headers = {"Authorization": f"Bearer {api.api_key}"}
             
             base_url = api.base_url or "https://api-inference.huggingface.co"
@@ -111,15 +229,20 @@ class AIManager:
             
             payload = {
                 "inputs": prompt,
-                "parameters": api.config or {}
+                "parameters": dict(api.config or {})
             }
+            if max_tokens:
+                payload["parameters"]["max_new_tokens"] = max_tokens
             
             async with session.post(url, headers=headers, json=payload) as response:
                 if response.status == 200:
                     result = await response.json()
                     if isinstance(result, list) and len(result) > 0:
-                        return result[0].get("generated_text", "").strip()
-                    return str(result)
+                        text = result[0].get("generated_text", "").strip()
+                    else:
+                        text = str(result)
+                    self._record_usage(usage, None, prompt, text)
+                    return text
                 else:
                     error_text = await response.text()
                     raise Exception(f"HuggingFace API error: {response.status} - {error_text}")
@@ -128,10 +251,16 @@ class AIManager:
             logger.error(f"HuggingFace API error: {e}")
             raise
     
-    async def call_anthropic_api(self, api: AIApiProvider, prompt: str) -> str:
+    async def call_anthropic_api(
+        self,
+        api: AIApiProvider,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        usage: Optional[Dict[str, int]] = None
+    ) -> str:
         """Chamar API da Anthropic (Claude)"""
         try:
-            session = await self.get_session()
+            session = await self.clients.get_session(api)
             headers = {
                 "x-api-key": api.api_key,
                 "Content-Type": "application/json",
@@ -143,7 +272,7 @@ class AIManager:
             
             payload = {
                 "model": api.model_name,
-                "max_tokens": api.config.get("max_tokens", 500) if api.config else 500,
+                "max_tokens": max_tokens or (api.config.get("max_tokens", 500) if api.config else 500),
                 "messages": [
                     {"role": "user", "content": prompt}
                 ]
@@ -152,7 +281,10 @@ class AIManager:
             async with session.post(url, headers=headers, json=payload) as response:
                 if response.status == 200:
                     result = await response.json()
-                    return result["content"][0]["text"].strip()
+                    text = result["content"][0]["text"].strip()
+                    tokens = result.get("usage", {})
+                    self._record_usage(usage, tokens.get("input_tokens", 0) + tokens.get("output_tokens", 0) or None, prompt, text)
+                    return text
                 else:
                     error_text = await response.text()
                     raise Exception(f"Anthropic API error: {response.status} - {error_text}")
@@ -161,10 +293,16 @@ class AIManager:
             logger.error(f"Anthropic API error: {e}")
             raise
     
-    async def call_groq_api(self, api: AIApiProvider, prompt: str) -> str:
+    async def call_groq_api(
+        self,
+        api: AIApiProvider,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        usage: Optional[Dict[str, int]] = None
+    ) -> str:
         """Chamar API da Groq"""
         try:
-            session = await self.get_session()
+            session = await self.clients.get_session(api)
             headers = {
                 "Authorization": f"Bearer {api.api_key}",
                 "Content-Type": "application/json"
@@ -179,14 +317,16 @@ class AIManager:
                     {"role": "system", "content": "Você é um assistente especializado em análise de conteúdo."},
                     {"role": "user", "content": prompt}
                 ],
-                "max_tokens": api.config.get("max_tokens", 500) if api.config else 500,
+                "max_tokens": max_tokens or (api.config.get("max_tokens", 500) if api.config else 500),
                 "temperature": api.config.get("temperature", 0.7) if api.config else 0.7
             }
             
             async with session.post(url, headers=headers, json=payload) as response:
                 if response.status == 200:
                     result = await response.json()
-                    return result["choices"][0]["message"]["content"].strip()
+                    text = result["choices"][0]["message"]["content"].strip()
+                    self._record_usage(usage, result.get("usage", {}).get("total_tokens"), prompt, text)
+                    return text
                 else:
                     error_text = await response.text()
                     raise Exception(f"Groq API error: {response.status} - {error_text}")
@@ -195,22 +335,150 @@ class AIManager:
             logger.error(f"Groq API error: {e}")
             raise
     
-    async def call_api(self, api: AIApiProvider, prompt: str) -> str:
+    def _record_usage(self, usage: Optional[Dict[str, int]], tokens: Optional[int], prompt: str, text: str):
+        """Somar tokens usados; estima ~4 caracteres por token quando o provedor não informa"""
+        if usage is None:
+            return
+        if not tokens:
+            tokens = (len(prompt) + len(text)) // 4
+        usage["tokens"] = usage.get("tokens", 0) + tokens
+    
+    async def call_local_api(
+        self,
+        api: AIApiProvider,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        usage: Optional[Dict[str, int]] = None
+    ) -> str:
+        """Classificador local: devolve o tópico mais provável do texto como JSON"""
+        [(topic, confidence)] = await self.local_classifier.classify([prompt], api.model_name, api.config)
+        return json.dumps({"topic": topic, "confidence": round(confidence, 3)}, ensure_ascii=False)
+    
+    async def call_api(
+        self,
+        api: AIApiProvider,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        usage: Optional[Dict[str, int]] = None
+    ) -> str:
         """Chamar API específica baseada no tipo"""
         if api.api_type.lower() == "openai":
-            return await self.call_openai_api(api, prompt)
+            return await self.call_openai_api(api, prompt, max_tokens, usage)
         elif api.api_type.lower() == "huggingface":
-            return await self.call_huggingface_api(api, prompt)
+            return await self.call_huggingface_api(api, prompt, max_tokens, usage)
         elif api.api_type.lower() == "anthropic":
-            return await self.call_anthropic_api(api, prompt)
+            return await self.call_anthropic_api(api, prompt, max_tokens, usage)
         elif api.api_type.lower() == "groq":
-            return await self.call_groq_api(api, prompt)
+            return await self.call_groq_api(api, prompt, max_tokens, usage)
+        elif api.api_type.lower() == "local":
+            return await self.call_local_api(api, prompt, max_tokens, usage)
         else:
             raise Exception(f"Tipo de API não suportado: {api.api_type}")
     
-    async def generate_with_fallback(self, prompt: str, max_retries: int = 3) -> Dict[str, Any]:
-        """Gerar resposta com sistema de fallback automático"""
-        apis = await self.get_available_apis()
+    async def _call_tracked(
+        self,
+        api: AIApiProvider,
+        prompt: str,
+        max_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Chamar o provedor registrando estatísticas e latência"""
+        started = time.perf_counter()
+        try:
+            usage: Dict[str, int] = {}
+            response = await self.call_api(api, prompt, max_tokens, usage)
+        except asyncio.CancelledError:
+            # Hedge perdedor: não conta como falha
+            self.health.release_probe(api.id)
+            raise
+        except Exception as e:
+            logger.error(f"API {api.name} failed: {e}")
+            self.health.record_failure(api.id)
+            await self.update_api_stats(api.id, False)
+            raise
+        
+        self.health.record_success(api.id, time.perf_counter() - started)
+        await self.update_api_stats(api.id, True)
+        
+        return {
+            "success": True,
+            "response": response,
+            "api_used": api.name,
+            "api_id": api.id,
+            "tokens": usage.get("tokens", 0)
+        }
+    
+    async def _call_with_hedge(
+        self,
+        api: AIApiProvider,
+        apis: List[AIApiProvider],
+        next_index: int,
+        prompt: str,
+        max_tokens: Optional[int] = None
+    ) -> Tuple[Dict[str, Any], int]:
+        """Se o provedor passar do seu p90 sem responder, disparar o próximo em paralelo.
+        
+        A primeira resposta válida vence e a outra requisição é cancelada. Retorna
+        (resultado, índice do próximo provedor ainda não tentado); se nada der
+        certo, levanta HedgeFailed com esse mesmo índice.
+        """
+        delay = self.health.hedge_delay(api.id)
+        primary = asyncio.create_task(self._call_tracked(api, prompt, max_tokens))
+        tasks = {primary}
+        
+        try:
+            if delay is None:
+                return await primary, next_index
+            
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result(), next_index
+            
+            hedge_api = None
+            while next_index < len(apis):
+                candidate = apis[next_index]
+                next_index += 1
+                if await self.acquire_provider(candidate):
+                    hedge_api = candidate
+                    break
+            
+            if hedge_api is None:
+                self.hedging_stats["no_candidate"] += 1
+                try:
+                    return await primary, next_index
+                except Exception as e:
+                    raise HedgeFailed(e, next_index) from e
+            
+            logger.info(f"API {api.name} passou de {delay:.2f}s, disparando hedge em {hedge_api.name}")
+            self.hedging_stats["hedged"] += 1
+            hedge = asyncio.create_task(self._call_tracked(hedge_api, prompt, max_tokens))
+            tasks.add(hedge)
+            
+            pending = set(tasks)
+            last_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.hedging_stats["hedge_wins" if task is hedge else "primary_wins"] += 1
+                        return task.result(), next_index
+                    last_error = task.exception()
+            raise HedgeFailed(last_error, next_index) from last_error
+        finally:
+            # Cancel the loser (or both, if we were cancelled ourselves)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    async def generate_with_fallback(
+        self,
+        prompt: str,
+        max_retries: int = 3,
+        max_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Gerar resposta com sistema de fallback automático (e hedge opcional, AI_HEDGING_ENABLED)"""
+        # Classificadores locais não geram texto livre; ficam fora do fallback
+        apis = [api for api in await self.get_available_apis() if not is_local_api(api)]
+        apis = self.health.rank(apis)
         
         if not apis:
             raise Exception("Nenhuma API de IA disponível")
@@ -218,36 +486,32 @@ class AIManager:
         last_error = None
         
         for attempt in range(max_retries):
-            for api in apis:
+            index = 0
+            while index < len(apis):
+                api = apis[index]
+                index += 1
                 try:
-                    # Check rate limiting
-                    if not await self.can_make_request(api):
-                        logger.warning(f"Rate limit exceeded for API {api.name}, skipping...")
+                    # Open circuit breaker or rate limit: skip without waiting on a degraded provider
+                    if not await self.acquire_provider(api):
                         continue
                     
                     logger.info(f"Tentando API {api.name} (tentativa {attempt + 1})")
                     
-                    # Make the API call
-                    response = await self.call_api(api, prompt)
-                    
-                    # Update success stats
-                    await self.update_api_stats(api.id, True)
+                    if self.hedging_enabled:
+                        result, index = await self._call_with_hedge(api, apis, index, prompt, max_tokens)
+                    else:
+                        result = await self._call_tracked(api, prompt, max_tokens)
                     
-                    return {
-                        "success": True,
-                        "response": response,
-                        "api_used": api.name,
-                        "api_id": api.id,
-                        "attempt": attempt + 1
-                    }
+                    result["attempt"] = attempt + 1
+                    return result
                     
+                except HedgeFailed as e:
+                    # Principal e hedge falharam: seguir do primeiro provedor ainda não tentado
+                    last_error = e.error
+                    index = e.next_index
+                    continue
                 except Exception as e:
                     last_error = e
-                    logger.error(f"API {api.name} failed: {e}")
-                    
-                    # Update failure stats
-                    await self.update_api_stats(api.id, False)
-                    
                     # Continue to next API
                     continue
             
@@ -296,7 +560,9 @@ class AIManager:
         }}
         """
         
+        started = time.perf_counter()
         result = await self.generate_with_fallback(prompt)
+        self._record_categorization("single", 1, result.get("tokens", 0), time.perf_counter() - started)
         
         try:
             # Parse JSON response
@@ -312,5 +578,189 @@ class AIManager:
                 "sentiment": "neutral",
                 "importance_score": 0.5,
                 "summary": description[:200] + "..." if len(description) > 200 else description,
-                "api_used": result["api_used"]
-            }
\ No newline at end of file
+                "api_used": result["api_used"],
+                "is_fallback": True
+            }
+    
+    async def get_batch_size(self) -> int:
+        """Tamanho de lote do provedor remoto de maior prioridade (config["batch_size"])"""
+        apis = [api for api in await self.get_available_apis() if not is_local_api(api)]
+        if not apis:
+            return 1
+        config = apis[0].config or {}
+        return max(1, int(config.get("batch_size", AI_BATCH_SIZE)))
+    
+    async def categorize_batch(self, items: List[Dict[str, str]]) -> Dict[str, Dict[str, Any]]:
+        """Categorizar vários itens por chamada; retorna {item_id: categorização}.
+        
+        Cada item é um dict com id, title, description e content. Com um provedor
+        "local" ativo, itens classificados com confiança suficiente não vão para
+        provedores remotos. Itens ausentes ou inválidos na resposta em lote são
+        categorizados individualmente; se isso também falhar, vale a classificação
+        local de baixa confiança (marcada is_fallback) ou o item fica fora do resultado.
+        """
+        local_results, threshold = await self.classify_locally(items)
+        results: Dict[str, Dict[str, Any]] = {
+            item_id: categorization
+            for item_id, categorization in local_results.items()
+            if categorization["confidence"] >= threshold
+        }
+        remote_items = [item for item in items if item["id"] not in results]
+        batch_size = await self.get_batch_size() if remote_items else 1
+        
+        for offset in range(0, len(remote_items), batch_size):
+            chunk = remote_items[offset:offset + batch_size]
+            
+            if len(chunk) > 1:
+                try:
+                    results.update(await self._categorize_chunk(chunk))
+                except Exception as e:
+                    logger.error(f"Erro na categorização em lote ({len(chunk)} itens): {e}")
+            
+            # Per-item fallback for anything the batch call did not return
+            for item in chunk:
+                if item["id"] in results:
+                    continue
+                try:
+                    results[item["id"]] = await self.categorize_content(
+                        item["title"],
+                        item.get("description") or "",
+                        item.get("content") or ""
+                    )
+                except Exception as e:
+                    logger.error(f"Erro na categorização AI do item {item['id']}: {e}")
+        
+        # Provedores remotos indisponíveis: melhor a classificação local que nenhuma
+        for item_id, categorization in local_results.items():
+            if item_id not in results:
+                results[item_id] = {**categorization, "is_fallback": True}
+        
+        return results
+    
+    async def classify_locally(self, items: List[Dict[str, str]]) -> Tuple[Dict[str, Dict[str, Any]], float]:
+        """Categorizar com o provedor "local" de maior prioridade; retorna (resultados, limiar de confiança)"""
+        api = next((api for api in await self.get_available_apis() if is_local_api(api)), None)
+        if api is None or not items:
+            return {}, LOCAL_CONFIDENCE_THRESHOLD
+        
+        config = api.config or {}
+        threshold = float(config.get("confidence_threshold", LOCAL_CONFIDENCE_THRESHOLD))
+        texts = [f"{item['title']}. {item.get('description') or ''}" for item in items]
+        
+        started = time.perf_counter()
+        try:
+            predictions = await self.local_classifier.classify(texts, api.model_name, config)
+        except Exception as e:
+            logger.error(f"Classificador local {api.name} falhou: {e}")
+            await self.update_api_stats(api.id, False)
+            return {}, threshold
+        await self.update_api_stats(api.id, True)
+        
+        # O zero-shot só decide o tópico: subtópico, sentimento e importância ficam
+        # NULL (desconhecidos) em vez de valores inventados
+        results = {}
+        for item, (topic, confidence) in zip(items, predictions):
+            description = item.get("description") or ""
+            results[item["id"]] = {
+                "topic": topic,
+                "subtopic": None,
+                "tags": [topic.lower()],
+                "sentiment": None,
+                "importance_score": None,
+                "summary": description[:200] + "..." if len(description) > 200 else description,
+                "api_used": api.name,
+                "confidence": round(confidence, 3)
+            }
+        
+        accepted = sum(1 for result in results.values() if result["confidence"] >= threshold)
+        self._record_categorization("local", accepted, 0, time.perf_counter() - started)
+        return results, threshold
+    
+    async def _categorize_chunk(self, chunk: List[Dict[str, str]]) -> Dict[str, Dict[str, Any]]:
+        """Uma única chamada para todo o lote; ids curtos (1..N) economizam tokens"""
+        keys = {str(index + 1): item["id"] for index, item in enumerate(chunk)}
+        payload = [
+            {
+                "id": key,
+                "title": item["title"],
+                "description": item.get("description") or "",
+                "content": (item.get("content") or "")[:500]
+            }
+            for key, item in zip(keys, chunk)
+        ]
+        
+        prompt = f"""
+        Analise os seguintes itens RSS e forneça uma categorização estruturada para cada um.
+
+        ITENS (JSON):
+        {json.dumps(payload, ensure_ascii=False)}
+
+        Responda APENAS com um array JSON válido, com um objeto por item, neste formato:
+        [
+            {{
+                "id": "id do item",
+                "topic": "tópico principal",
+                "subtopic": "subtópico específico",
+                "tags": ["tag1", "tag2", "tag3"],
+                "sentiment": "positive/negative/neutral",
+                "importance_score": 0.8,
+                "summary": "resumo em 2-3 frases"
+            }}
+        ]
+        """
+        
+        started = time.perf_counter()
+        result = await self.generate_with_fallback(prompt, max_tokens=AI_BATCH_TOKENS_PER_ITEM * len(chunk))
+        
+        parsed = _extract_json_array(result["response"])
+        categorized = {}
+        for entry in parsed:
+            if not isinstance(entry, dict) or "topic" not in entry:
+                continue
+            item_id = keys.get(str(entry.pop("id", "")))
+            if item_id:
+                entry["api_used"] = result["api_used"]
+                categorized[item_id] = entry
+        
+        self._record_categorization("batch", len(categorized), result.get("tokens", 0), time.perf_counter() - started)
+        return categorized
+    
+    def _record_categorization(self, mode: str, items: int, tokens: int, seconds: float):
+        stats = self.categorization_stats[mode]
+        stats["calls"] += 1
+        stats["items"] += items
+        stats["tokens"] += tokens
+        stats["seconds"] += seconds
+    
+    def get_hedging_stats(self) -> Dict[str, Any]:
+        """Frequência de hedge e qual requisição venceu"""
+        return {
+            "enabled": self.hedging_enabled,
+            **self.hedging_stats
+        }
+    
+    def get_categorization_stats(self) -> Dict[str, Any]:
+        """Itens por minuto e tokens por item, por caminho (single, batch e local)"""
+        report = {}
+        for mode, stats in self.categorization_stats.items():
+            report[mode] = {
+                "calls": stats["calls"],
+                "items": stats["items"],
+                "tokens": stats["tokens"],
+                "items_per_minute": round(stats["items"] / stats["seconds"] * 60, 2) if stats["seconds"] else 0.0,
+                "tokens_per_item": round(stats["tokens"] / stats["items"], 1) if stats["items"] else 0.0
+            }
+        return report
+
+
+def _extract_json_array(text: str) -> List[Any]:
+    """Extrair o array JSON da resposta (tolerando cercas de código e texto em volta)"""
+    start = text.find("[")
+    end = text.rfind("]")
+    if start == -1 or end <= start:
+        return []
+    try:
+        parsed = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return []
+    return parsed if isinstance(parsed, list) else []
@@ -0,0 +1,330 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Set, Tuple
+from sqlalchemy import select, update, func, or_
+from database import AsyncSessionLocal, RSSItem
+from services.categorization_cache import CategorizationCache, content_hash
+from services.topic_cache import clean_topic_name
+from services.topic_stats import add_categorized_items
+
+logger = logging.getLogger(__name__)
+
+# Número de workers de categorização concorrentes
+AI_WORKER_CONCURRENCY = int(os.getenv("AI_WORKER_CONCURRENCY", "4"))
+
+# Itens reivindicados por vez por cada worker
+AI_CLAIM_BATCH_SIZE = int(os.getenv("AI_CLAIM_BATCH_SIZE", "5"))
+
+# Duração do lease; itens em "processing" com lease vencido são reivindicados de novo
+AI_LEASE_SECONDS = int(os.getenv("AI_LEASE_SECONDS", "600"))
+
+# Tentativas antes de marcar o item como "failed"
+AI_MAX_ATTEMPTS = int(os.getenv("AI_MAX_ATTEMPTS", "3"))
+
+# Espera máxima quando a fila está vazia (novos itens acordam os workers antes)
+AI_IDLE_POLL_SECONDS = int(os.getenv("AI_IDLE_POLL_SECONDS", "30"))
+
+# Backoff exponencial entre tentativas de um item (base * 2^(tentativas-1), até o máximo);
+# o mesmo vale para o worker quando um lote inteiro falha
+AI_RETRY_BASE_SECONDS = int(os.getenv("AI_RETRY_BASE_SECONDS", "30"))
+AI_RETRY_MAX_SECONDS = int(os.getenv("AI_RETRY_MAX_SECONDS", "1800"))
+
+
+def retry_delay(attempts: int) -> int:
+    """Espera antes da próxima tentativa após `attempts` falhas seguidas"""
+    return min(AI_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), AI_RETRY_MAX_SECONDS)
+
+
+class AIWorkerPool:
+    """Fila durável de categorização AI sobre rss_items.ai_processing_status"""
+
+    def __init__(self, ai_manager, rss_processor, cache: CategorizationCache, concurrency: int = AI_WORKER_CONCURRENCY):
+        self.ai_manager = ai_manager
+        self.rss_processor = rss_processor
+        self.cache = cache
+        self.concurrency = max(1, concurrency)
+        self._wakeup = asyncio.Event()
+        self._tasks: Set[asyncio.Task] = set()
+        self.completed_items = 0
+        self.failed_attempts = 0
+        self.cluster_reuses = 0
+
+    def notify(self):
+        """Acordar os workers (ex: novos itens inseridos)"""
+        self._wakeup.set()
+
+    async def claim_items(self, limit: int) -> List[RSSItem]:
+        """Reivindicar itens pendentes ou com lease vencido sem bloquear outros workers.
+
+        Em itens "pending", ai_lease_expires_at é o "não antes de" do backoff de release_failed.
+        """
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(RSSItem)
+                .where(
+                    or_(
+                        RSSItem.ai_processing_status == "pending",
+                        RSSItem.ai_processing_status == "processing"
+                    ),
+                    or_(RSSItem.ai_lease_expires_at.is_(None), RSSItem.ai_lease_expires_at < now)
+                )
+                .order_by(RSSItem.created_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            items = result.scalars().all()
+
+            for item in items:
+                item.ai_processing_status = "processing"
+                item.ai_lease_expires_at = now + timedelta(seconds=AI_LEASE_SECONDS)
+                item.ai_attempts = (item.ai_attempts or 0) + 1
+
+            await db.commit()
+            return items
+
+    async def complete_items(self, results: List[Tuple[RSSItem, dict]]):
+        """Gravar os resultados do lote (só itens cujo lease ainda é deste worker) e os tópicos, numa transação"""
+        if not results:
+            return
+
+        async with AsyncSessionLocal() as db:
+            topics = []
+            categorized = []
+            for item, categorization in results:
+                # Mesmos nomes (limpos e truncados) em rss_items, topics e topic_stats
+                categorization = {
+                    **categorization,
+                    "topic": clean_topic_name(categorization.get("topic")) or None,
+                    "subtopic": clean_topic_name(categorization.get("subtopic")) or None
+                }
+                result = await db.execute(
+                    update(RSSItem)
+                    .where(
+                        RSSItem.id == item.id,
+                        RSSItem.ai_processing_status == "processing",
+                        RSSItem.ai_lease_expires_at == item.ai_lease_expires_at
+                    )
+                    .values(
+                        ai_summary=categorization.get("summary", ""),
+                        ai_topic=categorization["topic"],
+                        ai_subtopic=categorization["subtopic"],
+                        ai_tags=categorization.get("tags", []),
+                        ai_sentiment=categorization.get("sentiment", "neutral"),
+                        ai_importance_score=categorization.get("importance_score", 0.5),
+                        ai_processing_status="completed",
+                        ai_processed_at=datetime.utcnow(),
+                        ai_api_used=categorization.get("api_used", ""),
+                        ai_lease_expires_at=None
+                    )
+                    .returning(RSSItem.id)
+                    .execution_options(synchronize_session=False)
+                )
+
+                if result.scalar_one_or_none() is None:
+                    logger.warning(f"Lease perdido para o item {item.id}, resultado descartado")
+                    continue
+
+                topics.append((categorization["topic"], categorization["subtopic"]))
+                categorized.append(categorization)
+                logger.info(f"Item categorizado: {item.title[:50]}... -> {categorization.get('topic')}/{categorization.get('subtopic')}")
+
+            # Create/update topics: one upsert per level for the whole batch
+            await self.rss_processor.ensure_topics_exist(topics, db)
+            await add_categorized_items(db, categorized)
+
+            await db.commit()
+            self.completed_items += len(topics)
+
+    async def release_failed(self, item: RSSItem):
+        """Devolver o item à fila com backoff ou marcá-lo como falho após AI_MAX_ATTEMPTS"""
+        attempts = item.ai_attempts or 0
+        if attempts >= AI_MAX_ATTEMPTS:
+            status, not_before = "failed", None
+        else:
+            status, not_before = "pending", datetime.utcnow() + timedelta(seconds=retry_delay(attempts))
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(RSSItem)
+                .where(
+                    RSSItem.id == item.id,
+                    RSSItem.ai_lease_expires_at == item.ai_lease_expires_at
+                )
+                .values(ai_processing_status=status, ai_lease_expires_at=not_before)
+            )
+            await db.commit()
+        self.failed_attempts += 1
+
+    async def get_cluster_categorizations(self, items: List[RSSItem]) -> Dict[str, dict]:
+        """Categorizações já concluídas nos clusters dos itens (cluster_id -> resultado)"""
+        cluster_ids = {item.cluster_id for item in items if item.cluster_id}
+        if not cluster_ids:
+            return {}
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(
+                    RSSItem.cluster_id,
+                    RSSItem.ai_summary,
+                    RSSItem.ai_topic,
+                    RSSItem.ai_subtopic,
+                    RSSItem.ai_tags,
+                    RSSItem.ai_sentiment,
+                    RSSItem.ai_importance_score,
+                    RSSItem.ai_api_used
+                )
+                .where(
+                    RSSItem.cluster_id.in_(cluster_ids),
+                    RSSItem.ai_processing_status == "completed"
+                )
+                .distinct(RSSItem.cluster_id)
+                .order_by(RSSItem.cluster_id, RSSItem.ai_processed_at)
+            )
+            return {
+                row.cluster_id: {
+                    "summary": row.ai_summary,
+                    "topic": row.ai_topic,
+                    "subtopic": row.ai_subtopic,
+                    "tags": row.ai_tags,
+                    "sentiment": row.ai_sentiment,
+                    "importance_score": row.ai_importance_score,
+                    "api_used": row.ai_api_used
+                }
+                for row in result.all()
+            }
+
+    async def process_items(self, items: List[RSSItem]) -> int:
+        """Categorizar os itens reivindicados em lote (com fallback por item no AIManager).
+
+        Retorna quantos itens foram categorizados.
+        """
+        to_categorize = []
+        for item in items:
+            if (item.ai_attempts or 0) > AI_MAX_ATTEMPTS:
+                # Reivindicado de novo após sucessivos leases vencidos (ex: crash durante a chamada)
+                await self.release_failed(item)
+            else:
+                to_categorize.append(item)
+
+        if not to_categorize:
+            return 0
+
+        # Mesma história (cluster) já categorizada: reaproveitar sem chamar provedores
+        clustered = await self.get_cluster_categorizations(to_categorize)
+        pending = [item for item in to_categorize if item.cluster_id not in clustered]
+
+        # Cópias sindicadas da mesma matéria saem do cache sem chamar provedores
+        hashes = {
+            item.id: content_hash(item.title, item.description or "", item.content or "")
+            for item in to_categorize
+        }
+        cached = await self.cache.get_many(hashes[item.id] for item in pending)
+        misses = [item for item in pending if hashes[item.id] not in cached]
+
+        # Um representante por cluster dentro do lote
+        representatives: Dict[str, RSSItem] = {}
+        for item in misses:
+            representatives.setdefault(item.cluster_id or hashes[item.id], item)
+
+        results = {}
+        if representatives:
+            try:
+                results = await self.ai_manager.categorize_batch([
+                    {
+                        "id": item.id,
+                        "title": item.title,
+                        "description": item.description or "",
+                        "content": item.content or ""
+                    }
+                    for item in representatives.values()
+                ])
+            except Exception as e:
+                logger.error(f"Erro na categorização AI de {len(representatives)} itens: {e}")
+
+            try:
+                await self.cache.put_many({
+                    hashes[item_id]: categorization
+                    for item_id, categorization in results.items()
+                    if not categorization.get("is_fallback")
+                })
+            except Exception as e:
+                logger.error(f"Erro ao gravar cache de categorização: {e}")
+
+        batch_results = {key: results.get(item.id) for key, item in representatives.items()}
+
+        completed = []
+        for item in to_categorize:
+            categorization = (
+                clustered.get(item.cluster_id)
+                or cached.get(hashes[item.id])
+                or batch_results.get(item.cluster_id or hashes[item.id])
+            )
+            if categorization:
+                if item.cluster_id in clustered:
+                    self.cluster_reuses += 1
+                completed.append((item, categorization))
+            else:
+                await self.release_failed(item)
+
+        await self.complete_items(completed)
+        return len(completed)
+
+    async def _worker(self, worker_id: int):
+        failed_batches = 0
+        while True:
+            try:
+                batch_size = await self.ai_manager.get_batch_size()
+                items = await self.claim_items(max(AI_CLAIM_BATCH_SIZE, batch_size))
+
+                if not items:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=AI_IDLE_POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                if await self.process_items(items):
+                    failed_batches = 0
+                    continue
+
+                # Lote inteiro falhou (provedores fora do ar, 429...): esperar antes de reivindicar de novo
+                failed_batches += 1
+                delay = retry_delay(failed_batches)
+                logger.warning(f"Worker de IA {worker_id}: lote sem nenhum item categorizado, aguardando {delay}s")
+                await asyncio.sleep(delay)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro no worker de IA {worker_id}: {e}")
+                await asyncio.sleep(5)
+
+    def start(self) -> List[asyncio.Task]:
+        """Iniciar os workers"""
+        for worker_id in range(self.concurrency):
+            task = asyncio.create_task(self._worker(worker_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return list(self._tasks)
+
+    async def get_stats(self) -> dict:
+        """Profundidade da fila e contadores dos workers"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(RSSItem.ai_processing_status, func.count(RSSItem.id))
+                .where(RSSItem.ai_processing_status.in_(["pending", "processing"]))
+                .group_by(RSSItem.ai_processing_status)
+            )
+            queue = dict(result.all())
+
+        return {
+            "workers": self.concurrency,
+            "pending": queue.get("pending", 0),
+            "processing": queue.get("processing", 0),
+            "completed_items": self.completed_items,
+            "failed_attempts": self.failed_attempts,
+            "cluster_reuses": self.cluster_reuses
+        }
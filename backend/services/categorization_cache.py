@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from database import AsyncSessionLocal, CategorizationCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Entradas mantidas no LRU em memória (na frente da tabela)
+CACHE_MEMORY_SIZE = int(os.getenv("AI_CACHE_MEMORY_SIZE", "10000"))
+
+# Entradas da tabela sem uso há mais de N dias são removidas
+CACHE_TTL_DAYS = int(os.getenv("AI_CACHE_TTL_DAYS", "30"))
+
+# Intervalo (segundos) entre limpezas da tabela
+CACHE_PRUNE_INTERVAL = int(os.getenv("AI_CACHE_PRUNE_INTERVAL", "3600"))
+
+# Mesmo recorte de conteúdo usado no prompt de categorização
+CACHE_CONTENT_CHARS = 500
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    text = _TAG_RE.sub(" ", text or "")
+    return _SPACE_RE.sub(" ", text).strip().lower()
+
+
+def content_hash(title: str, description: str, content: str = "") -> str:
+    """Hash do texto normalizado; cópias sindicadas da mesma matéria colidem de propósito"""
+    normalized = "\x1f".join([
+        _normalize(title),
+        _normalize(description),
+        _normalize(content)[:CACHE_CONTENT_CHARS]
+    ])
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class CategorizationCache:
+    """Cache de categorizações: LRU em memória na frente da tabela ai_categorization_cache"""
+
+    def __init__(self, max_memory_entries: int = CACHE_MEMORY_SIZE):
+        self.max_memory_entries = max(1, max_memory_entries)
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.memory_evictions = 0
+        self.db_evictions = 0
+
+    def _remember(self, key: str, result: Dict[str, Any]):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.memory_evictions += 1
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Buscar vários hashes: memória primeiro, depois uma única consulta ao banco"""
+        found: Dict[str, Dict[str, Any]] = {}
+        missing = []
+
+        for key in set(keys):
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                found[key] = self._memory[key]
+                self.memory_hits += 1
+            else:
+                missing.append(key)
+
+        if not missing:
+            return found
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(CategorizationCacheEntry.content_hash, CategorizationCacheEntry.result)
+                .where(CategorizationCacheEntry.content_hash.in_(missing))
+            )
+            rows = result.all()
+
+            if rows:
+                await db.execute(
+                    update(CategorizationCacheEntry)
+                    .where(CategorizationCacheEntry.content_hash.in_([key for key, _ in rows]))
+                    .values(
+                        hit_count=CategorizationCacheEntry.hit_count + 1,
+                        last_hit_at=datetime.utcnow()
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+
+        for key, cached in rows:
+            found[key] = cached
+            self._remember(key, cached)
+
+        self.db_hits += len(rows)
+        self.misses += len(missing) - len(rows)
+        return found
+
+    async def put_many(self, entries: Dict[str, Dict[str, Any]]):
+        """Gravar categorizações novas (memória e banco)"""
+        if not entries:
+            return
+
+        for key, result in entries.items():
+            self._remember(key, result)
+
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                pg_insert(CategorizationCacheEntry)
+                .values([
+                    {
+                        "content_hash": key,
+                        "result": result,
+                        "api_used": result.get("api_used"),
+                        "hit_count": 0,
+                        "created_at": now
+                    }
+                    for key, result in entries.items()
+                ])
+                .on_conflict_do_nothing(index_elements=[CategorizationCacheEntry.content_hash])
+            )
+            await db.commit()
+
+        self.stores += len(entries)
+
+    async def prune(self) -> int:
+        """Remover entradas da tabela sem uso há mais de CACHE_TTL_DAYS dias"""
+        cutoff = datetime.utcnow() - timedelta(days=CACHE_TTL_DAYS)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(CategorizationCacheEntry)
+                .where(func.coalesce(CategorizationCacheEntry.last_hit_at, CategorizationCacheEntry.created_at) < cutoff)
+            )
+            await db.commit()
+
+        self.db_evictions += result.rowcount or 0
+        return result.rowcount or 0
+
+    async def run_pruner(self):
+        """Loop de fundo da política de expiração da tabela"""
+        while True:
+            await asyncio.sleep(CACHE_PRUNE_INTERVAL)
+            try:
+                removed = await self.prune()
+                if removed:
+                    logger.info(f"Cache de categorização: {removed} entradas expiradas removidas")
+            except Exception as e:
+                logger.error(f"Erro ao limpar cache de categorização: {e}")
+
+    def get_stats(self) -> dict:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "memory_max_entries": self.max_memory_entries,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.db_hits) / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "memory_evictions": self.memory_evictions,
+            "db_evictions": self.db_evictions,
+            "ttl_days": CACHE_TTL_DAYS
+        }
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Limites de concorrência: global e por host
+GLOBAL_FETCH_LIMIT = int(os.getenv("FEED_FETCH_CONCURRENCY", "100"))
+PER_HOST_FETCH_LIMIT = int(os.getenv("FEED_FETCH_PER_HOST", "2"))
+
+FETCH_TIMEOUT = int(os.getenv("FEED_FETCH_TIMEOUT", "30"))
+DNS_CACHE_TTL = int(os.getenv("FEED_DNS_CACHE_TTL", "300"))
+KEEPALIVE_TIMEOUT = int(os.getenv("FEED_KEEPALIVE_TIMEOUT", "30"))
+
+# Retry-After padrão (quando ausente) e máximo aceito, em segundos
+DEFAULT_RETRY_AFTER = 60
+MAX_RETRY_AFTER = int(os.getenv("FEED_MAX_RETRY_AFTER", "3600"))
+
+
+class FetchThrottled(Exception):
+    """Host pediu para esperar (429/503 com Retry-After) ou ainda está em espera"""
+
+    def __init__(self, host: str, retry_after: float, status: Optional[int] = None):
+        self.host = host
+        self.retry_after = retry_after
+        self.status = status
+        detail = f"HTTP {status}, " if status else ""
+        super().__init__(f"Host {host} limitado ({detail}tentar novamente em {int(retry_after)}s)")
+
+
+def get_host(url: str) -> str:
+    return (urlparse(url).hostname or url).lower()
+
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """Interpretar Retry-After em segundos ou como data HTTP"""
+    if not value:
+        return DEFAULT_RETRY_AFTER
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return DEFAULT_RETRY_AFTER
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        seconds = (retry_at - datetime.now(timezone.utc)).total_seconds()
+    return min(MAX_RETRY_AFTER, max(1.0, seconds))
+
+
+class FeedFetcher:
+    """Motor de busca de feeds com limite global, limite por host e respeito a Retry-After"""
+
+    def __init__(self, global_limit: int = GLOBAL_FETCH_LIMIT, per_host_limit: int = PER_HOST_FETCH_LIMIT):
+        self.global_limit = global_limit
+        self.per_host_limit = per_host_limit
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._global_semaphore = asyncio.Semaphore(global_limit)
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self.throttled_responses = 0
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.global_limit,
+                limit_per_host=self.per_host_limit,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+                enable_cleanup_closed=True
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT, connect=10),
+                headers={'User-Agent': 'AI-Feed-RSS/1.0'}
+            )
+        return self.session
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_limit)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    def retry_delay(self, url: str) -> float:
+        """Segundos até o host do URL aceitar novas requisições (0 se liberado)"""
+        blocked_until = self._blocked_until.get(get_host(url))
+        if not blocked_until:
+            return 0.0
+        return max(0.0, blocked_until - time.time())
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> dict:
+        """GET respeitando os limites; retorna status, corpo (bytes) e cabeçalhos"""
+        host = get_host(url)
+
+        delay = self.retry_delay(url)
+        if delay > 0:
+            raise FetchThrottled(host, delay)
+
+        # Slot do host primeiro, para não ocupar vagas globais esperando um host ocupado
+        async with self._host_semaphore(host):
+            async with self._global_semaphore:
+                session = await self.get_session()
+                async with session.get(url, headers=headers or {}) as response:
+                    if response.status in (429, 503):
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        self._blocked_until[host] = time.time() + retry_after
+                        self.throttled_responses += 1
+                        raise FetchThrottled(host, retry_after, response.status)
+
+                    return {
+                        "status": response.status,
+                        "body": await response.read(),
+                        "headers": response.headers
+                    }
+
+    def get_stats(self) -> dict:
+        now = time.time()
+        return {
+            "global_limit": self.global_limit,
+            "per_host_limit": self.per_host_limit,
+            "known_hosts": len(self._host_semaphores),
+            "throttled_hosts": sum(1 for until in self._blocked_until.values() if until > now),
+            "throttled_responses": self.throttled_responses
+        }
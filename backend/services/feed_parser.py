@@ -0,0 +1,306 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, List, Optional
+from xml.etree.ElementTree import Element, ParseError, XMLPullParser, tostring
+
+logger = logging.getLogger(__name__)
+
+# "process" (padrão) ou "thread"
+PARSE_EXECUTOR_KIND = os.getenv("FEED_PARSE_EXECUTOR", "process").lower()
+PARSE_WORKERS = int(os.getenv("FEED_PARSE_WORKERS", str(os.cpu_count() or 2)))
+
+# Parsing incremental: para após N guids conhecidos seguidos
+INCREMENTAL_PARSE_ENABLED = os.getenv("FEED_INCREMENTAL_PARSE", "1") == "1"
+INCREMENTAL_STOP_AFTER = int(os.getenv("FEED_INCREMENTAL_STOP_AFTER", "3"))
+RECENT_GUIDS_LIMIT = int(os.getenv("FEED_RECENT_GUIDS", "50"))
+INCREMENTAL_CHUNK_SIZE = 64 * 1024
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+RDF_NS = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+DC_NS = "http://purl.org/dc/elements/1.1/"
+
+
+def generate_item_guid(source_id: str, title: str, url: str) -> str:
+    """Gerar GUID único para item RSS"""
+    content = f"{source_id}:{title}:{url}"
+    return hashlib.md5(content.encode()).hexdigest()
+
+
+def _normalize_entry(entry) -> Dict[str, Any]:
+    """Reduzir um entry do feedparser aos campos usados na ingestão"""
+    # dc:date e Atom <updated> chegam como updated_parsed quando não há published
+    published_at = None
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    if parsed:
+        try:
+            published_at = datetime(*parsed[:6])
+        except (TypeError, ValueError):
+            pass
+
+    return {
+        "id": entry.get("id"),
+        "title": entry.get("title", ""),
+        "summary": entry.get("summary", ""),
+        "content": entry.get("content", [{}])[0].get("value", "") if entry.get("content") else "",
+        "link": entry.get("link", ""),
+        "author": entry.get("author", ""),
+        "published_at": published_at
+    }
+
+
+def parse_feed(content: bytes) -> Dict[str, Any]:
+    """Parsear o corpo bruto de um feed (executado fora do event loop)"""
+    import feedparser
+
+    feed = feedparser.parse(content)
+
+    return {
+        "title": feed.feed.get("title", ""),
+        "description": feed.feed.get("description", ""),
+        "link": feed.feed.get("link", ""),
+        "entries": [_normalize_entry(entry) for entry in feed.entries],
+        "bozo": bool(feed.bozo),
+        "bozo_exception": str(feed.get("bozo_exception", "")) if feed.bozo else None
+    }
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child_text(element: Element, *tags: str) -> str:
+    """Texto do primeiro filho presente entre `tags` (na ordem dada)"""
+    for tag in tags:
+        child = element.find(tag)
+        if child is not None and (child.text or "").strip():
+            return child.text.strip()
+    return ""
+
+
+def _parse_date(value: str) -> Optional[datetime]:
+    """pubDate (RFC 822) ou dc:date/published/updated (ISO 8601) em UTC naive; só para ordenar"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _element_key(element: Element):
+    """(id, título, link, data) de um <item>/<entry>, o bastante para reconhecer guids conhecidos.
+
+    Os campos do entry em si vêm sempre do feedparser (_normalize_entry).
+    """
+    if element.tag == f"{{{ATOM_NS}}}entry":
+        link = ""
+        for link_el in element.findall(f"{{{ATOM_NS}}}link"):
+            if link_el.get("rel", "alternate") == "alternate":
+                link = link_el.get("href", "")
+                break
+        return (
+            _child_text(element, f"{{{ATOM_NS}}}id") or None,
+            _child_text(element, f"{{{ATOM_NS}}}title"),
+            link,
+            _parse_date(_child_text(element, f"{{{ATOM_NS}}}published", f"{{{ATOM_NS}}}updated"))
+        )
+
+    if _local(element.tag) != "item":
+        # Atom 0.3 e afins: sem chave confiável, o chamador cai no parse completo
+        return None, "", "", None
+
+    namespace = element.tag[:-len("item")]
+    guid = _child_text(element, f"{namespace}guid")
+    return (
+        guid or element.get(f"{{{RDF_NS}}}about") or None,
+        _child_text(element, f"{namespace}title"),
+        _child_text(element, f"{namespace}link") or guid,
+        _parse_date(_child_text(element, f"{namespace}pubDate", f"{{{DC_NS}}}date"))
+    )
+
+
+def _iter_elements(content: bytes) -> Iterable[Element]:
+    """Gerar os <item>/<entry> um a um enquanto o documento é lido em blocos"""
+    parser = XMLPullParser(events=("end",))
+    for offset in range(0, len(content), INCREMENTAL_CHUNK_SIZE):
+        parser.feed(content[offset:offset + INCREMENTAL_CHUNK_SIZE])
+        for _, element in parser.read_events():
+            if _local(element.tag) in ("item", "entry"):
+                yield element
+    parser.close()
+
+
+def _parse_elements(elements: List[bytes], atom: bool) -> List[Dict[str, Any]]:
+    """Passar só os entries lidos pelo feedparser, num documento mínimo, e normalizá-los como parse_feed"""
+    import feedparser
+
+    if atom:
+        head, tail = b'<feed xmlns="http://www.w3.org/2005/Atom">', b"</feed>"
+    else:
+        head, tail = b'<rss version="2.0"><channel>', b"</channel></rss>"
+    feed = feedparser.parse(b'<?xml version="1.0" encoding="utf-8"?>' + head + b"".join(elements) + tail)
+    return [_normalize_entry(entry) for entry in feed.entries]
+
+
+def parse_feed_incremental(content: bytes, source_id: str, known_guids: List[str],
+                           stop_after: int = INCREMENTAL_STOP_AFTER) -> Dict[str, Any]:
+    """Parsear entries até encontrar uma sequência de guids já conhecidos.
+
+    Só para cedo em feeds do mais novo para o mais antigo: se alguma data
+    faltar ou subir antes da parada (feeds em ordem cronológica, sem datas),
+    o documento inteiro passa pelo parse completo. Os entries lidos vão para
+    o feedparser, então os campos são os mesmos de parse_feed. Retorna apenas
+    os entries ainda não conhecidos.
+    """
+    known = set(known_guids)
+    elements: List[bytes] = []
+    atom = False
+    seen = 0
+    known_run = 0
+    previous: Optional[datetime] = None
+    stopped_early = False
+
+    try:
+        for element in _iter_elements(content):
+            seen += 1
+            entry_id, title, link, published = _element_key(element)
+            if published is None or (previous is not None and published > previous):
+                # Ordem não comprovada: entries novos podem estar no fim
+                break
+            previous = published
+
+            guid = entry_id or generate_item_guid(source_id, title, link)
+            if guid in known:
+                known_run += 1
+                if known_run >= stop_after:
+                    stopped_early = True
+                    break
+            else:
+                known_run = 0
+
+            atom = element.tag == f"{{{ATOM_NS}}}entry"
+            elements.append(tostring(element))
+            element.clear()
+    except ParseError:
+        pass
+
+    if not stopped_early:
+        # Sem parada antecipada (ou XML malformado): parse completo e tolerante
+        return parse_feed(content)
+
+    entries = [
+        entry for entry in _parse_elements(elements, atom)
+        if (entry["id"] or generate_item_guid(source_id, entry["title"], entry["link"])) not in known
+    ]
+    return {
+        "title": "",
+        "description": "",
+        "link": "",
+        "entries": entries,
+        "bozo": False,
+        "bozo_exception": None,
+        "incremental": True,
+        "scanned_entries": seen,
+        "stopped_early": stopped_early
+    }
+
+
+def _with_simhashes(result: Dict[str, Any]) -> Dict[str, Any]:
+    """SimHash de cada entry calculado junto com o parse, fora do event loop"""
+    from services.story_clusters import simhash
+
+    for entry in result["entries"]:
+        entry["simhash"] = simhash(entry["title"], entry["summary"] or "")
+    return result
+
+
+def parse_feed_task(content: bytes) -> Dict[str, Any]:
+    """parse_feed + SimHash dos entries (função executada no pool)"""
+    return _with_simhashes(parse_feed(content))
+
+
+def parse_feed_incremental_task(content: bytes, source_id: str, known_guids: List[str]) -> Dict[str, Any]:
+    """parse_feed_incremental + SimHash dos entries (função executada no pool)"""
+    return _with_simhashes(parse_feed_incremental(content, source_id, known_guids))
+
+
+class FeedParseExecutor:
+    """Executor dedicado ao parsing de feeds (pool de processos ou de threads)"""
+
+    def __init__(self, kind: str = PARSE_EXECUTOR_KIND, max_workers: int = PARSE_WORKERS):
+        self.kind = kind if kind in ("process", "thread") else "process"
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[Executor] = None
+        self.parse_count = 0
+        self.parse_seconds = 0.0
+        self.early_stops = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "thread":
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="feed-parse")
+            else:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+        return self._executor
+
+    async def _run(self, func, *args) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.parse_count += 1
+            self.parse_seconds += time.perf_counter() - started
+
+    async def parse(self, content: bytes) -> Dict[str, Any]:
+        """Parsear o feed no pool sem bloquear o event loop"""
+        return await self._run(parse_feed_task, content)
+
+    async def parse_incremental(self, content: bytes, source_id: str, known_guids: List[str]) -> Dict[str, Any]:
+        """Parsear apenas os entries novos, parando na primeira sequência de guids conhecidos"""
+        result = await self._run(parse_feed_incremental_task, content, source_id, known_guids)
+        if result.get("stopped_early"):
+            self.early_stops += 1
+        return result
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> dict:
+        return {
+            "executor": self.kind,
+            "max_workers": self.max_workers,
+            "parse_count": self.parse_count,
+            "parse_seconds": round(self.parse_seconds, 3),
+            "incremental_enabled": INCREMENTAL_PARSE_ENABLED,
+            "early_stops": self.early_stops
+        }
+
+
+_default_executor: Optional[FeedParseExecutor] = None
+
+
+def get_parse_executor() -> FeedParseExecutor:
+    """Executor de parsing compartilhado pelo processo"""
+    global _default_executor
+    if _default_executor is None:
+        _default_executor = FeedParseExecutor()
+    return _default_executor
@@ -0,0 +1,203 @@
+import asyncio
+import heapq
+import logging
+import os
+import random
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import select, update
+from database import AsyncSessionLocal, RSSSource
+from services.feed_fetcher import GLOBAL_FETCH_LIMIT
+
+logger = logging.getLogger(__name__)
+
+# Limites do intervalo adaptativo (segundos)
+MIN_FETCH_INTERVAL = int(os.getenv("FEED_MIN_INTERVAL", "300"))
+MAX_FETCH_INTERVAL = int(os.getenv("FEED_MAX_INTERVAL", "86400"))
+
+# Quantos sources podem ser processados ao mesmo tempo (o fetcher aplica também o limite por host)
+SCHEDULER_CONCURRENCY = int(os.getenv("FEED_SCHEDULER_CONCURRENCY", str(GLOBAL_FETCH_LIMIT)))
+
+# Intervalo para recarregar a lista de sources ativos do banco
+SOURCES_REFRESH_INTERVAL = int(os.getenv("FEED_SCHEDULER_REFRESH", "60"))
+
+# Fatores de ajuste do intervalo
+SPEEDUP_FACTOR = 0.5   # feed publicou itens novos
+SLOWDOWN_FACTOR = 1.5  # feed não publicou nada
+
+
+def _to_timestamp(value: datetime) -> float:
+    """Converter datetime UTC naive do banco para timestamp"""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class FeedScheduler:
+    """Agendador de feeds com fila de prioridade pelo próximo horário de busca de cada source"""
+
+    def __init__(self, rss_processor):
+        self.rss_processor = rss_processor
+        self._heap: List[Tuple[float, str]] = []
+        self._due: Dict[str, float] = {}  # source_id -> horário agendado (entradas antigas do heap são ignoradas)
+        self._intervals: Dict[str, int] = {}
+        self._urls: Dict[str, str] = {}
+        self._running: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(SCHEDULER_CONCURRENCY)
+        self._last_refresh = 0.0
+
+    def clamp_interval(self, interval: float) -> int:
+        return int(min(MAX_FETCH_INTERVAL, max(MIN_FETCH_INTERVAL, interval)))
+
+    def next_interval(self, current: int, new_items: Optional[int]) -> int:
+        """Adaptar o intervalo à frequência com que o source publica guids novos"""
+        if new_items is None:
+            # Erro: mantém o intervalo atual
+            return self.clamp_interval(current)
+        if new_items > 0:
+            return self.clamp_interval(current * SPEEDUP_FACTOR)
+        return self.clamp_interval(current * SLOWDOWN_FACTOR)
+
+    def schedule(self, source_id: str, due: float):
+        """Agendar (ou reagendar) um source para o horário indicado"""
+        self._due[source_id] = due
+        heapq.heappush(self._heap, (due, source_id))
+        self._wakeup.set()
+
+    def schedule_now(self, source_id: str, interval: Optional[int] = None, url: Optional[str] = None):
+        """Buscar um source assim que possível (ex: recém-criado ou reativado)"""
+        self._intervals.setdefault(source_id, self.clamp_interval(interval or MIN_FETCH_INTERVAL))
+        if url:
+            self._urls[source_id] = url
+        if source_id not in self._running:
+            self.schedule(source_id, time.time())
+
+    def unschedule(self, source_id: str):
+        self._due.pop(source_id, None)
+        self._intervals.pop(source_id, None)
+        self._urls.pop(source_id, None)
+
+    def _peek(self) -> Optional[Tuple[float, str]]:
+        """Próxima entrada válida do heap, descartando entradas obsoletas"""
+        while self._heap:
+            due, source_id = self._heap[0]
+            if self._due.get(source_id) == due:
+                return due, source_id
+            heapq.heappop(self._heap)
+        return None
+
+    async def refresh_sources(self):
+        """Sincronizar a fila com os sources ativos do banco"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(
+                    RSSSource.id,
+                    RSSSource.url,
+                    RSSSource.fetch_interval,
+                    RSSSource.adaptive_interval,
+                    RSSSource.last_fetched
+                ).where(RSSSource.is_active == True)
+            )
+            rows = result.all()
+
+        now = time.time()
+        active_ids = set()
+
+        for source_id, url, fetch_interval, adaptive_interval, last_fetched in rows:
+            active_ids.add(source_id)
+            self._urls[source_id] = url
+            if source_id in self._due or source_id in self._running:
+                continue
+
+            interval = self.clamp_interval(adaptive_interval or fetch_interval or MIN_FETCH_INTERVAL)
+            self._intervals[source_id] = interval
+
+            due = _to_timestamp(last_fetched) + interval if last_fetched else now
+            if due <= now:
+                # Espalhar sources atrasados para evitar rajadas
+                due = now + random.uniform(0, min(interval, SOURCES_REFRESH_INTERVAL))
+            self.schedule(source_id, due)
+
+        for source_id in list(self._due):
+            if source_id not in active_ids:
+                self.unschedule(source_id)
+
+        self._last_refresh = now
+
+    async def _run_source(self, source_id: str):
+        try:
+            new_items = await self.rss_processor.process_source(source_id)
+        except Exception as e:
+            logger.error(f"Erro no agendador ao processar source {source_id}: {e}")
+            new_items = None
+        finally:
+            self._running.discard(source_id)
+            self._semaphore.release()
+
+        if source_id not in self._intervals:
+            return  # Source removido enquanto era processado
+
+        interval = self.next_interval(self._intervals[source_id], new_items)
+        if interval != self._intervals[source_id]:
+            self._intervals[source_id] = interval
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(RSSSource)
+                    .where(RSSSource.id == source_id)
+                    .values(adaptive_interval=interval)
+                )
+                await db.commit()
+
+        delay = interval
+        if new_items is None and source_id in self._urls:
+            # Host pediu Retry-After: volta assim que liberado, sem penalizar o intervalo
+            retry_delay = self.rss_processor.fetcher.retry_delay(self._urls[source_id])
+            if retry_delay > 0:
+                delay = retry_delay + random.uniform(0, 5)
+
+        self.schedule(source_id, time.time() + delay)
+
+    async def run(self):
+        """Loop principal: despacha cada source quando chega seu horário"""
+        while True:
+            try:
+                if time.time() - self._last_refresh >= SOURCES_REFRESH_INTERVAL:
+                    await self.refresh_sources()
+
+                entry = self._peek()
+                wait = SOURCES_REFRESH_INTERVAL if entry is None else entry[0] - time.time()
+
+                if wait > 0:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=min(wait, SOURCES_REFRESH_INTERVAL))
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                due, source_id = heapq.heappop(self._heap)
+                del self._due[source_id]
+
+                await self._semaphore.acquire()
+                self._running.add(source_id)
+                task = asyncio.create_task(self._run_source(source_id))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro no agendador de feeds: {e}")
+                await asyncio.sleep(60)
+
+    def get_stats(self) -> dict:
+        """Estado atual da fila de agendamento"""
+        entry = self._peek()
+        return {
+            "scheduled_sources": len(self._due),
+            "running_sources": len(self._running),
+            "next_due_in": max(0.0, entry[0] - time.time()) if entry else None,
+            "min_interval": MIN_FETCH_INTERVAL,
+            "max_interval": MAX_FETCH_INTERVAL
+        }
@@ -0,0 +1,128 @@
+import asyncio
+import importlib.util
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from database import AsyncSessionLocal, Topic
+
+logger = logging.getLogger(__name__)
+
+# Modelo zero-shot padrão (multilíngue, roda em CPU); sobrescrito por model_name do provedor
+LOCAL_CLASSIFIER_MODEL = os.getenv("LOCAL_CLASSIFIER_MODEL", "MoritzLaurer/mDeBERTa-v3-base-mnli-xnli")
+
+# Confiança mínima para aceitar o resultado local sem chamar provedores remotos
+LOCAL_CONFIDENCE_THRESHOLD = float(os.getenv("LOCAL_CONFIDENCE_THRESHOLD", "0.6"))
+
+# Itens por passada de inferência
+LOCAL_BATCH_SIZE = int(os.getenv("LOCAL_BATCH_SIZE", "16"))
+
+# Máximo de tópicos principais (os de maior item_count) usados como rótulos;
+# o custo da inferência zero-shot cresce linearmente com o número de rótulos
+LOCAL_MAX_LABELS = int(os.getenv("LOCAL_MAX_LABELS", "20"))
+
+# Rótulos usados enquanto não houver tópicos principais no banco
+LOCAL_DEFAULT_LABELS = [
+    label.strip()
+    for label in os.getenv(
+        "LOCAL_CLASSIFIER_LABELS",
+        "Tecnologia,Negócios,Ciência,Política,Saúde,Esportes,Entretenimento"
+    ).split(",")
+    if label.strip()
+]
+
+LOCAL_HYPOTHESIS_TEMPLATE = "Este texto é sobre {}."
+LABELS_REFRESH_SECONDS = 300
+LOCAL_TEXT_CHARS = 1000
+
+
+def is_local_api(api) -> bool:
+    return (api.api_type or "").lower() == "local"
+
+
+def transformers_available() -> bool:
+    return importlib.util.find_spec("transformers") is not None
+
+
+class LocalClassifier:
+    """Classificação zero-shot em CPU contra os nomes dos tópicos principais"""
+
+    def __init__(self):
+        # transformers é importado só quando um provedor "local" é usado
+        self._pipelines: Dict[str, Any] = {}
+        self._lock = asyncio.Lock()
+        self._labels: List[str] = []
+        self._labels_loaded_at = 0.0
+
+    async def get_labels(self) -> List[str]:
+        """Os LOCAL_MAX_LABELS tópicos principais com mais itens (recarregados a cada LABELS_REFRESH_SECONDS)"""
+        if self._labels and time.monotonic() - self._labels_loaded_at < LABELS_REFRESH_SECONDS:
+            return self._labels
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Topic.name)
+                .where(Topic.parent_topic_id.is_(None), Topic.name != "")
+                .order_by(Topic.item_count.desc().nulls_last(), Topic.name)
+                .limit(max(1, LOCAL_MAX_LABELS))
+            )
+            names = [name for name in result.scalars().all() if name]
+
+        self._labels = names or LOCAL_DEFAULT_LABELS
+        self._labels_loaded_at = time.monotonic()
+        return self._labels
+
+    def _get_pipeline(self, model_name: str, device: int):
+        classifier = self._pipelines.get(model_name)
+        if classifier is None:
+            from transformers import pipeline
+
+            logger.info(f"Carregando modelo local {model_name}")
+            classifier = pipeline("zero-shot-classification", model=model_name, device=device)
+            self._pipelines[model_name] = classifier
+        return classifier
+
+    def _classify_sync(
+        self,
+        texts: List[str],
+        labels: List[str],
+        model_name: str,
+        config: Dict[str, Any]
+    ) -> List[Tuple[str, float]]:
+        classifier = self._get_pipeline(model_name, int(config.get("device", -1)))
+        outputs = classifier(
+            texts,
+            candidate_labels=labels,
+            hypothesis_template=config.get("hypothesis_template", LOCAL_HYPOTHESIS_TEMPLATE),
+            batch_size=int(config.get("batch_size", LOCAL_BATCH_SIZE))
+        )
+        if isinstance(outputs, dict):
+            outputs = [outputs]
+        return [(output["labels"][0], float(output["scores"][0])) for output in outputs]
+
+    async def classify(
+        self,
+        texts: List[str],
+        model_name: Optional[str] = None,
+        config: Optional[Dict[str, Any]] = None,
+        labels: Optional[List[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """(rótulo, confiança) por texto; a inferência roda fora do event loop"""
+        if not texts:
+            return []
+        if not transformers_available():
+            raise Exception("Provedor local requer o pacote transformers (veja requirements.txt)")
+
+        labels = labels or await self.get_labels()
+        texts = [text[:LOCAL_TEXT_CHARS] for text in texts]
+
+        # Um modelo por vez: o pipeline não é seguro para chamadas concorrentes
+        async with self._lock:
+            return await asyncio.to_thread(
+                self._classify_sync,
+                texts,
+                labels,
+                model_name or LOCAL_CLASSIFIER_MODEL,
+                config or {}
+            )
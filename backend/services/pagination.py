@@ -0,0 +1,101 @@
+import base64
+import json
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence, Tuple
+from fastapi import HTTPException
+from sqlalchemy import inspect, tuple_
+from sqlalchemy.sql.util import ClauseAdapter
+from database import RSSItem, item_importance_key, item_recency_key
+
+# Cabeçalho com o cursor da próxima página (listagens que retornam lista pura)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class Keyset:
+    """Ordenação DESC por chaves sem NULL + id como desempate, com cursor opaco.
+
+    O cursor é a chave da última linha da página (base64 de JSON); a próxima
+    página é `WHERE (k1, k2, ..., id) < (cursor)`, que usa o índice composto
+    de mesma ordem e não depende do que foi inserido antes dela.
+    """
+
+    def __init__(self, name: str, columns: Sequence, values: Callable[[RSSItem], tuple], datetime_positions: Tuple[int, ...]):
+        self.name = name
+        self.columns = (*columns, RSSItem.id)
+        self._values = values
+        self._datetime_positions = datetime_positions
+
+    def order_by(self) -> List:
+        return [column.desc() for column in self.columns]
+
+    def encode(self, item: RSSItem) -> str:
+        payload = [self.name, *[_encode_value(value) for value in self._values(item)], item.id]
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> list:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            name, values = payload[0], payload[1:]
+            if name != self.name or len(values) != len(self.columns):
+                raise ValueError(cursor)
+            # Tipos conferidos aqui: um cursor adulterado vira 400, não erro do banco
+            *keys, item_id = values
+            for position, value in enumerate(keys):
+                if position in self._datetime_positions:
+                    if not isinstance(value, str):
+                        raise ValueError(cursor)
+                    values[position] = datetime.fromisoformat(value)
+                elif isinstance(value, bool) or not isinstance(value, (int, float)):
+                    raise ValueError(cursor)
+            if not isinstance(item_id, str):
+                raise ValueError(cursor)
+            return values
+        except (ValueError, TypeError, IndexError, KeyError):
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    def after(self, cursor: str):
+        """Condição para as linhas depois do cursor"""
+        return tuple_(*self.columns) < tuple_(*self.decode(cursor))
+
+    def ranked_before(self, other):
+        """Condição para a linha de `other` (aliased(RSSItem)) vir antes da linha atual de RSSItem"""
+        adapter = ClauseAdapter(inspect(other).selectable)
+        adapted = [adapter.traverse(getattr(column, "__clause_element__", lambda: column)()) for column in self.columns]
+        return tuple_(*adapted) > tuple_(*self.columns)
+
+    def next_cursor(self, items: Sequence[RSSItem], limit: int) -> Optional[str]:
+        """Cursor da próxima página; None quando esta página é a última"""
+        if not items or len(items) < limit:
+            return None
+        return self.encode(items[-1])
+
+
+def _recency(item: RSSItem) -> datetime:
+    return item.published_at or item.created_at
+
+
+def _importance(item: RSSItem) -> float:
+    return item.ai_importance_score if item.ai_importance_score is not None else -1.0
+
+
+# Timeline e itens de tópico: importância, depois recência. Itens sem importância
+# (ainda não categorizados) vão para o fim e itens sem published_at entram pela
+# data de criação; o ORDER BY anterior (DESC puro) punha os dois no topo.
+IMPORTANCE_KEYSET = Keyset(
+    "importance",
+    (item_importance_key, item_recency_key, RSSItem.created_at),
+    lambda item: (_importance(item), _recency(item), item.created_at),
+    datetime_positions=(1, 2)
+)
+
+# Itens de site e de source: recência
+RECENCY_KEYSET = Keyset(
+    "recency",
+    (item_recency_key, RSSItem.created_at),
+    lambda item: (_recency(item), item.created_at),
+    datetime_positions=(0, 1)
+)
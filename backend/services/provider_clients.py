@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import os
+from typing import Any, Callable, Dict, Optional, Tuple
+import aiohttp
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Timeouts (segundos) das chamadas aos provedores de IA
+AI_HTTP_TIMEOUT = float(os.getenv("AI_HTTP_TIMEOUT", "60"))
+AI_HTTP_CONNECT_TIMEOUT = float(os.getenv("AI_HTTP_CONNECT_TIMEOUT", "10"))
+
+# Conexões por provedor e tempo de keep-alive das conexões ociosas
+AI_HTTP_MAX_CONNECTIONS = int(os.getenv("AI_HTTP_MAX_CONNECTIONS", "20"))
+AI_HTTP_KEEPALIVE = float(os.getenv("AI_HTTP_KEEPALIVE", "60"))
+
+
+def config_version(api) -> str:
+    """Versão da configuração do provedor: muda a cada PUT em /api/ai-apis/{id}"""
+    return api.updated_at.isoformat() if api.updated_at else ""
+
+
+class ProviderClientCache:
+    """Um cliente HTTP por provedor (id + versão da configuração), reaproveitando conexões TCP/TLS.
+
+    Clientes substituídos ou invalidados não são fechados na hora: outras
+    corrotinas podem estar no meio de uma chamada com eles. O fechamento é
+    adiado por AI_HTTP_TIMEOUT, o limite de duração dessas chamadas.
+    """
+
+    def __init__(self):
+        # api_id -> (versão, tipo, cliente)
+        self._clients: Dict[str, Tuple[str, str, Any]] = {}
+        # Fechamentos adiados em andamento: task -> (api_id, cliente)
+        self._retiring: Dict[asyncio.Task, Tuple[str, Any]] = {}
+        self.created = 0
+        self.reused = 0
+
+    def _client(self, api, kind: str, factory: Callable[[], Any]) -> Any:
+        """Cliente em cache ou recém-criado.
+
+        Sem await entre a leitura e a escrita de _clients: misses concorrentes
+        do mesmo provedor não criam dois clientes nem sobrescrevem um em uso.
+        """
+        version = config_version(api)
+        entry = self._clients.get(api.id)
+        if entry is not None:
+            cached_version, cached_kind, client = entry
+            if cached_kind == kind and not _is_closed(client) and cached_version >= version:
+                # Mesma configuração, ou o chamador leu uma versão anterior à do cache
+                self.reused += 1
+                return client
+            self._retire(api.id, client)
+
+        client = factory()
+        self._clients[api.id] = (version, kind, client)
+        self.created += 1
+        return client
+
+    def _retire(self, api_id: str, client: Any):
+        if _is_closed(client):
+            return
+        task = asyncio.get_running_loop().create_task(self._close_later(api_id, client))
+        self._retiring[task] = (api_id, client)
+        task.add_done_callback(self._retiring.pop)
+
+    async def _close_later(self, api_id: str, client: Any, delay: Optional[float] = None):
+        # Chamadas já iniciadas terminam (ou estouram o timeout) antes do fechamento
+        await asyncio.sleep(AI_HTTP_TIMEOUT + AI_HTTP_CONNECT_TIMEOUT if delay is None else delay)
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Erro ao fechar cliente do provedor {api_id}: {e}")
+
+    async def get_openai_client(self, api):
+        """AsyncOpenAI com pool httpx próprio (limites e timeouts explícitos)"""
+        def factory():
+            import openai
+
+            return openai.AsyncOpenAI(
+                api_key=api.api_key,
+                base_url=api.base_url,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=AI_HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=AI_HTTP_MAX_CONNECTIONS,
+                        keepalive_expiry=AI_HTTP_KEEPALIVE
+                    ),
+                    timeout=httpx.Timeout(AI_HTTP_TIMEOUT, connect=AI_HTTP_CONNECT_TIMEOUT)
+                )
+            )
+
+        return self._client(api, "openai", factory)
+
+    async def get_session(self, api) -> aiohttp.ClientSession:
+        """Sessão aiohttp do provedor (Anthropic, Groq, HuggingFace)"""
+        def factory():
+            return aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=AI_HTTP_MAX_CONNECTIONS,
+                    keepalive_timeout=AI_HTTP_KEEPALIVE,
+                    ttl_dns_cache=300
+                ),
+                timeout=aiohttp.ClientTimeout(total=AI_HTTP_TIMEOUT, connect=AI_HTTP_CONNECT_TIMEOUT)
+            )
+
+        return self._client(api, "aiohttp", factory)
+
+    async def invalidate(self, api_id: str):
+        """Remover o cliente do provedor (configuração alterada, desativado ou removido).
+
+        O próximo pedido cria um cliente novo; o antigo é fechado depois que as
+        chamadas em andamento terminam.
+        """
+        entry = self._clients.pop(api_id, None)
+        if entry is not None:
+            self._retire(api_id, entry[2])
+
+    async def close_all(self):
+        """Encerramento da aplicação: fechar tudo agora, inclusive os fechamentos adiados"""
+        for task, (api_id, client) in list(self._retiring.items()):
+            task.cancel()
+            await self._close_later(api_id, client, delay=0)
+        for api_id, (_, _, client) in list(self._clients.items()):
+            await self._close_later(api_id, client, delay=0)
+        self._clients.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            "open_clients": len(self._clients),
+            "retiring_clients": len(self._retiring),
+            "created": self.created,
+            "reused": self.reused
+        }
+
+
+def _is_closed(client: Any) -> bool:
+    if isinstance(client, aiohttp.ClientSession):
+        return client.closed
+    return client.is_closed()
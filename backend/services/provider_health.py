@@ -0,0 +1,202 @@
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+# Latências guardadas por provedor para calcular percentis
+LATENCY_WINDOW = int(os.getenv("AI_LATENCY_WINDOW", "200"))
+
+# Amostras mínimas antes de confiar no p90 do provedor
+HEDGE_MIN_SAMPLES = int(os.getenv("AI_HEDGE_MIN_SAMPLES", "20"))
+
+# Espera mínima (segundos) antes de disparar a requisição de hedge
+HEDGE_MIN_DELAY = float(os.getenv("AI_HEDGE_MIN_DELAY", "0.5"))
+
+# Peso da amostra mais recente nas médias móveis exponenciais (EWMA)
+HEALTH_EWMA_ALPHA = float(os.getenv("AI_HEALTH_EWMA_ALPHA", "0.2"))
+
+# Meia-vida (segundos) da taxa de erro sem novas requisições: provedores rebaixados voltam à fila
+HEALTH_ERROR_HALF_LIFE = float(os.getenv("AI_HEALTH_ERROR_HALF_LIFE", "120"))
+
+# Circuit breaker: falhas seguidas ou taxa de erro (EWMA) que abrem o circuito
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("AI_BREAKER_FAILURES", "5"))
+BREAKER_ERROR_RATE = float(os.getenv("AI_BREAKER_ERROR_RATE", "0.5"))
+BREAKER_MIN_REQUESTS = 10
+
+# Tempo (segundos) com o circuito aberto antes da sonda half-open; dobra a cada sonda falha
+BREAKER_COOLDOWN = float(os.getenv("AI_BREAKER_COOLDOWN", "30"))
+BREAKER_MAX_COOLDOWN = float(os.getenv("AI_BREAKER_MAX_COOLDOWN", "600"))
+
+# Taxa de erro a partir da qual o provedor vai para o fim da fila, mesmo com o circuito fechado
+DEGRADED_ERROR_RATE = 0.25
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class LatencyWindow:
+    """Últimas N latências bem-sucedidas de um provedor"""
+
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=max(1, size))
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+        return ordered[index]
+
+
+class ProviderState:
+    """Saúde de um provedor: latência e taxa de erro (EWMA) e estado do circuit breaker"""
+
+    def __init__(self):
+        self.latencies = LatencyWindow()
+        self.ewma_latency: Optional[float] = None
+        self.ewma_error_rate = 0.0
+        self.error_updated_at = time.monotonic()
+        self.requests = 0
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.cooldown = BREAKER_COOLDOWN
+        self.probe_in_flight = False
+
+    @property
+    def error_rate(self) -> float:
+        """Taxa de erro EWMA, decaindo com o tempo desde a última requisição"""
+        elapsed = time.monotonic() - self.error_updated_at
+        return self.ewma_error_rate * 0.5 ** (elapsed / HEALTH_ERROR_HALF_LIFE)
+
+    def _update_error_rate(self, failed: bool):
+        rate = self.error_rate
+        self.ewma_error_rate = HEALTH_EWMA_ALPHA * (1.0 if failed else 0.0) + (1 - HEALTH_EWMA_ALPHA) * rate
+        self.error_updated_at = time.monotonic()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.probe_in_flight = False
+
+    def record_success(self, seconds: float):
+        self.requests += 1
+        self.latencies.record(seconds)
+        self.ewma_latency = seconds if self.ewma_latency is None else (
+            HEALTH_EWMA_ALPHA * seconds + (1 - HEALTH_EWMA_ALPHA) * self.ewma_latency
+        )
+        self._update_error_rate(False)
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            # Sonda bem-sucedida: fechar o circuito e zerar o backoff
+            self.state = CLOSED
+            self.cooldown = BREAKER_COOLDOWN
+            self.probe_in_flight = False
+
+    def record_failure(self):
+        self.requests += 1
+        self._update_error_rate(True)
+        self.consecutive_failures += 1
+
+        if self.state == HALF_OPEN:
+            self.cooldown = min(BREAKER_MAX_COOLDOWN, self.cooldown * 2)
+            self._open()
+        elif self.state == CLOSED and (
+            self.consecutive_failures >= BREAKER_FAILURE_THRESHOLD
+            or (self.requests >= BREAKER_MIN_REQUESTS and self.ewma_error_rate >= BREAKER_ERROR_RATE)
+        ):
+            self._open()
+
+    def allow_request(self) -> bool:
+        """Fechado: sim. Aberto: não, até vencer o cooldown, quando uma única sonda passa (half-open)"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def release_probe(self):
+        """A sonda não chegou a ser feita (rate limit) ou foi cancelada"""
+        self.probe_in_flight = False
+
+    @property
+    def degraded(self) -> bool:
+        return self.state != CLOSED or self.error_rate >= DEGRADED_ERROR_RATE
+
+    def score(self) -> float:
+        """Custo esperado de uma requisição: latência penalizada pela taxa de erro (menor é melhor)"""
+        latency = self.ewma_latency if self.ewma_latency is not None else 0.0
+        return latency * (1 + 4 * self.error_rate)
+
+
+class ProviderHealth:
+    """Modelo de saúde em memória dos provedores de IA, por api_id"""
+
+    def __init__(self):
+        self.providers: Dict[str, ProviderState] = {}
+
+    def get(self, api_id: str) -> ProviderState:
+        state = self.providers.get(api_id)
+        if state is None:
+            state = ProviderState()
+            self.providers[api_id] = state
+        return state
+
+    def record_success(self, api_id: str, seconds: float):
+        self.get(api_id).record_success(seconds)
+
+    def record_failure(self, api_id: str):
+        self.get(api_id).record_failure()
+
+    def allow_request(self, api_id: str) -> bool:
+        return self.get(api_id).allow_request()
+
+    def release_probe(self, api_id: str):
+        self.get(api_id).release_probe()
+
+    def rank(self, apis: List) -> List:
+        """Saudáveis antes de degradados; depois prioridade configurada; depois custo esperado"""
+        return sorted(
+            apis,
+            key=lambda api: (self.get(api.id).degraded, api.priority, self.get(api.id).score())
+        )
+
+    def p90(self, api_id: str) -> Optional[float]:
+        state = self.providers.get(api_id)
+        return state.latencies.percentile(0.9) if state else None
+
+    def hedge_delay(self, api_id: str) -> Optional[float]:
+        """Quanto esperar pelo provedor antes do hedge; None sem amostras suficientes"""
+        state = self.providers.get(api_id)
+        if state is None or len(state.latencies.samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(HEDGE_MIN_DELAY, state.latencies.percentile(0.9))
+
+    def remove(self, api_id: str):
+        self.providers.pop(api_id, None)
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        report = {}
+        for api_id, state in self.providers.items():
+            p50 = state.latencies.percentile(0.5)
+            p90 = state.latencies.percentile(0.9)
+            report[api_id] = {
+                "state": state.state,
+                "degraded": state.degraded,
+                "ewma_latency_seconds": round(state.ewma_latency, 3) if state.ewma_latency is not None else None,
+                "ewma_error_rate": round(state.error_rate, 3),
+                "consecutive_failures": state.consecutive_failures,
+                "retry_in_seconds": round(max(0.0, state.opened_at + state.cooldown - now), 1) if state.state == OPEN else 0.0,
+                "samples": len(state.latencies.samples),
+                "p50_seconds": round(p50, 3) if p50 is not None else None,
+                "p90_seconds": round(p90, 3) if p90 is not None else None
+            }
+        return report
@@ -0,0 +1,66 @@
+import time
+from typing import Dict
+
+
+class TokenBucket:
+    """Token bucket simples: capacidade = requisições por minuto, reposição contínua"""
+
+    def __init__(self, requests_per_minute: int):
+        self.capacity = max(1, requests_per_minute)
+        self.tokens = float(self.capacity)
+        self.refill_rate = self.capacity / 60.0  # tokens por segundo
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    def try_acquire(self) -> bool:
+        """Consumir um token se disponível (sem await: atômico no event loop)"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def resize(self, requests_per_minute: int):
+        """Ajustar a capacidade mantendo a fração de tokens disponíveis"""
+        self._refill()
+        ratio = self.tokens / self.capacity
+        self.capacity = max(1, requests_per_minute)
+        self.refill_rate = self.capacity / 60.0
+        self.tokens = ratio * self.capacity
+
+    @property
+    def used(self) -> int:
+        """Requisições consumidas na janela atual (aproximação do antigo current_requests)"""
+        self._refill()
+        return int(self.capacity - self.tokens)
+
+
+class ProviderRateLimiter:
+    """Um token bucket por provedor de IA, dimensionado por max_requests_per_minute"""
+
+    def __init__(self):
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    def sync(self, api_id: str, requests_per_minute: int) -> TokenBucket:
+        """Obter o bucket do provedor, redimensionando se a configuração mudou"""
+        bucket = self.buckets.get(api_id)
+        if bucket is None:
+            bucket = TokenBucket(requests_per_minute)
+            self.buckets[api_id] = bucket
+        elif bucket.capacity != max(1, requests_per_minute):
+            bucket.resize(requests_per_minute)
+        return bucket
+
+    def try_acquire(self, api_id: str, requests_per_minute: int) -> bool:
+        return self.sync(api_id, requests_per_minute).try_acquire()
+
+    def remove(self, api_id: str):
+        self.buckets.pop(api_id, None)
+
+    def used(self, api_id: str) -> int:
+        bucket = self.buckets.get(api_id)
+        return bucket.used if bucket else 0
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from typing import List
+from fastapi import Request
+from services.ai_manager import AIManager
+from services.ai_worker import AIWorkerPool
+from services.categorization_cache import CategorizationCache
+from services.feed_fetcher import FeedFetcher
+from services.feed_parser import get_parse_executor
+from services.feed_scheduler import FeedScheduler
+from services.rss_processor import RSSProcessor
+from services.story_clusters import StoryClusterIndex
+from services.topic_stats import ensure_topic_stats
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceRegistry:
+    """Instâncias de serviço compartilhadas pelo processo, criadas e encerradas pelo lifespan"""
+
+    def __init__(self):
+        # Uma sessão HTTP por finalidade: feeds (FeedFetcher) e provedores de IA (AIManager)
+        self.ai_manager = AIManager()
+        self.feed_fetcher = FeedFetcher()
+        self.parse_executor = get_parse_executor()
+        self.cluster_index = StoryClusterIndex()
+        self.rss_processor = RSSProcessor(
+            ai_manager=self.ai_manager,
+            fetcher=self.feed_fetcher,
+            parse_executor=self.parse_executor,
+            cluster_index=self.cluster_index
+        )
+        self.feed_scheduler = FeedScheduler(self.rss_processor)
+        self.categorization_cache = CategorizationCache()
+        self.ai_worker = AIWorkerPool(self.ai_manager, self.rss_processor, self.categorization_cache)
+        self.rss_processor.on_new_items = self.ai_worker.notify
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        """Iniciar as tarefas de fundo"""
+        try:
+            await self.cluster_index.load()
+        except Exception as e:
+            logger.error(f"Erro ao carregar índice de clusters: {e}")
+        try:
+            await ensure_topic_stats()
+        except Exception as e:
+            logger.error(f"Erro ao construir rollup topic_stats: {e}")
+
+        self._tasks.append(asyncio.create_task(self.feed_scheduler.run()))
+        self._tasks.extend(self.ai_worker.start())
+        self._tasks.append(asyncio.create_task(self.ai_manager.run_stats_flusher()))
+        self._tasks.append(asyncio.create_task(self.categorization_cache.run_pruner()))
+
+    async def shutdown(self):
+        """Cancelar tarefas de fundo e liberar sessões HTTP e pools"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+        # Contadores das APIs ainda não gravados pelo flusher
+        try:
+            await self.ai_manager.flush_api_stats()
+        except Exception as e:
+            logger.error(f"Erro ao gravar estatísticas das APIs no encerramento: {e}")
+
+        await self.rss_processor.close()
+        self.parse_executor.shutdown()
+
+
+# FastAPI dependencies
+def get_services(request: Request) -> ServiceRegistry:
+    return request.app.state.services
+
+
+def get_rss_processor(request: Request) -> RSSProcessor:
+    return get_services(request).rss_processor
+
+
+def get_ai_manager(request: Request) -> AIManager:
+    return get_services(request).ai_manager
+
+
+def get_feed_scheduler(request: Request) -> FeedScheduler:
+    return get_services(request).feed_scheduler
+
+
+def get_ai_worker(request: Request) -> AIWorkerPool:
+    return get_services(request).ai_worker
+
+
+def get_categorization_cache(request: Request) -> CategorizationCache:
+    return get_services(request).categorization_cache
@@ -1,36 +1,50 @@
 import asyncio
 import logging
-from datetime import datetime, timedelta
-from typing import List, Optional
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
-from database import AsyncSessionLocal, RSSSource, RSSItem, Topic
-import feedparser
-import aiohttp
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from database import AsyncSessionLocal, RSSSource, RSSItem
+import time
 from urllib.parse import urlparse
 import hashlib
 from services.ai_manager import AIManager
+from services.feed_fetcher import FeedFetcher, get_host
+from services.feed_parser import (
+    FeedParseExecutor,
+    INCREMENTAL_PARSE_ENABLED,
+    RECENT_GUIDS_LIMIT,
+    generate_item_guid,
+    get_parse_executor
+)
+from services.story_clusters import StoryClusterIndex
+from services.topic_cache import TopicCache
 
 logger = logging.getLogger(__name__)
 
 class RSSProcessor:
     """Processador de feeds RSS com organização automática por IA"""
     
-    def __init__(self):
-        self.ai_manager = AIManager()
-        self.session: Optional[aiohttp.ClientSession] = None
-        
-    async def get_session(self) -> aiohttp.ClientSession:
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=30),
-                headers={'User-Agent': 'AI-Feed-RSS/1.0'}
-            )
-        return self.session
+    def __init__(
+        self,
+        ai_manager: Optional[AIManager] = None,
+        fetcher: Optional[FeedFetcher] = None,
+        parse_executor: Optional[FeedParseExecutor] = None,
+        cluster_index: Optional[StoryClusterIndex] = None
+    ):
+        self.ai_manager = ai_manager or AIManager()
+        self.fetcher = fetcher or FeedFetcher()
+        self.parse_executor = parse_executor or get_parse_executor()
+        self.cluster_index = cluster_index or StoryClusterIndex()
+        self.topic_cache = TopicCache()
+        self.fetch_count = 0
+        self.fetch_seconds = 0.0
+        self.on_new_items: Optional[Callable[[], None]] = None
     
     async def close(self):
-        if self.session and not self.session.closed:
-            await self.session.close()
+        await self.fetcher.close()
         await self.ai_manager.close()
     
     def extract_site_name(self, url: str) -> str:
@@ -54,39 +68,73 @@ class RSSProcessor:
     
     def generate_item_guid(self, source_id: str, title: str, url: str) -> str:
         """Gerar GUID único para item RSS"""
-        content = f"{source_id}:{title}:{url}"
-        return hashlib.md5(content.encode()).hexdigest()
+        return generate_item_guid(source_id, title, url)
     
-    async def fetch_rss_feed(self, url: str) -> Optional[dict]:
-        """Buscar e parsear feed RSS"""
+    async def fetch_rss_feed(
+        self,
+        url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        source_id: Optional[str] = None,
+        known_guids: Optional[List[str]] = None
+    ) -> Optional[dict]:
+        """Buscar e parsear feed RSS usando GET condicional (ETag / Last-Modified)"""
         try:
-            session = await self.get_session()
+            headers = {}
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
             
-            async with session.get(url) as response:
-                if response.status != 200:
-                    raise Exception(f"HTTP {response.status}: {await response.text()}")
-                
-                content = await response.text()
-                
-            # Parse RSS feed
-            feed = feedparser.parse(content)
+            started = time.perf_counter()
+            try:
+                response = await self.fetcher.fetch(url, headers=headers)
+            finally:
+                self.fetch_count += 1
+                self.fetch_seconds += time.perf_counter() - started
+            
+            if response["status"] == 304:
+                return {"not_modified": True, "etag": etag, "last_modified": last_modified, "content_hash": content_hash}
+            
+            if response["status"] != 200:
+                raise Exception(f"HTTP {response['status']}: {response['body'][:500].decode(errors='replace')}")
+            
+            content = response["body"]
+            new_etag = response["headers"].get('ETag')
+            new_last_modified = response["headers"].get('Last-Modified')
             
-            if feed.bozo and not feed.entries:
-                raise Exception(f"Feed inválido: {feed.bozo_exception}")
+            # Skip parsing when the body is byte-identical to the last fetch
+            new_hash = hashlib.sha256(content).hexdigest()
+            if content_hash and new_hash == content_hash:
+                return {"not_modified": True, "etag": new_etag, "last_modified": new_last_modified, "content_hash": new_hash}
+            
+            # Parse RSS feed off the event loop; with known guids only the new head of the feed is parsed
+            if INCREMENTAL_PARSE_ENABLED and source_id and known_guids:
+                feed = await self.parse_executor.parse_incremental(content, source_id, known_guids)
+            else:
+                feed = await self.parse_executor.parse(content)
+            
+            if feed["bozo"] and not feed["entries"]:
+                raise Exception(f"Feed inválido: {feed['bozo_exception']}")
             
             return {
-                "title": feed.feed.get("title", ""),
-                "description": feed.feed.get("description", ""),
-                "link": feed.feed.get("link", url),
-                "entries": feed.entries
+                "not_modified": False,
+                "title": feed["title"],
+                "description": feed["description"],
+                "link": feed["link"] or url,
+                "entries": feed["entries"],
+                "etag": new_etag,
+                "last_modified": new_last_modified,
+                "content_hash": new_hash
             }
             
         except Exception as e:
             logger.error(f"Erro ao buscar RSS {url}: {e}")
             raise
     
-    async def process_source(self, source_id: str):
-        """Processar um source RSS específico"""
+    async def process_source(self, source_id: str) -> Optional[int]:
+        """Processar um source RSS específico; retorna o número de itens novos (None em caso de erro)"""
         async with AsyncSessionLocal() as db:
             # Get source
             result = await db.execute(select(RSSSource).where(RSSSource.id == source_id))
@@ -94,13 +142,24 @@ class RSSProcessor:
             
             if not source or not source.is_active:
                 logger.warning(f"Source {source_id} não encontrado ou inativo")
-                return
+                return None
             
-            logger.info(f"Processando RSS source: {source.name} ({source.url})")
+            source_name = source.name
+            logger.info(f"Processando RSS source: {source_name} ({source.url})")
+            
+            # Release the pooled connection while we wait on the network
+            await db.commit()
             
             try:
                 # Fetch RSS feed
-                feed_data = await self.fetch_rss_feed(source.url)
+                feed_data = await self.fetch_rss_feed(
+                    source.url,
+                    etag=source.etag,
+                    last_modified=source.last_modified,
+                    content_hash=source.content_hash,
+                    source_id=source_id,
+                    known_guids=source.recent_guids
+                )
                 
                 # Update source info
                 if not source.site_name:
@@ -109,8 +168,15 @@ class RSSProcessor:
                 source.last_fetched = datetime.utcnow()
                 source.last_error = None
                 
-                # Process each entry
-                new_items = 0
+                # Nothing changed upstream: only bump last_fetched (and the validators)
+                if feed_data["not_modified"]:
+                    self.apply_validators(source, feed_data)
+                    await db.commit()
+                    logger.info(f"Feed sem alterações: {source.name}")
+                    return 0
+                
+                # Build candidate rows (dedupe guids repeated inside the feed itself)
+                candidates = {}
                 for entry in feed_data["entries"]:
                     try:
                         # Generate GUID
@@ -120,158 +186,117 @@ class RSSProcessor:
                             entry.get("link", "")
                         )
                         
-                        # Check if item already exists
-                        existing_result = await db.execute(
-                            select(RSSItem).where(
-                                RSSItem.source_id == source_id,
-                                RSSItem.guid == guid
-                            )
-                        )
-                        
-                        if existing_result.scalar_one_or_none():
-                            continue  # Item já existe
+                        if guid in candidates:
+                            continue
                         
-                        # Parse published date
-                        published_at = None
-                        if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                            try:
-                                published_at = datetime(*entry.published_parsed[:6])
-                            except:
-                                pass
-                        
-                        # Create new RSS item
-                        new_item = RSSItem(
-                            source_id=source_id,
-                            title=entry.get("title", ""),
-                            description=entry.get("summary", ""),
-                            content=entry.get("content", [{}])[0].get("value", "") if entry.get("content") else "",
-                            url=entry.get("link", ""),
-                            guid=guid,
-                            author=entry.get("author", ""),
-                            published_at=published_at,
-                            ai_processing_status="pending"
-                        )
-                        
-                        db.add(new_item)
-                        new_items += 1
+                        candidates[guid] = {
+                            "id": str(uuid4()),
+                            "source_id": source_id,
+                            "title": entry["title"],
+                            "description": entry["summary"],
+                            "content": entry["content"],
+                            "url": entry["link"],
+                            "guid": guid,
+                            "author": entry["author"],
+                            "published_at": entry["published_at"],
+                            "simhash": entry.get("simhash"),
+                            "ai_processing_status": "pending"
+                        }
                         
                     except Exception as e:
                         logger.error(f"Erro ao processar entry: {e}")
                         continue
                 
-                # Update total items count
-                source.total_items += new_items
+                new_items = await self.insert_new_items(db, source_id, candidates)
+                
+                # Remember the newest guids (document order) for the next incremental parse
+                source.recent_guids = (
+                    list(candidates) + [guid for guid in (source.recent_guids or []) if guid not in candidates]
+                )[:RECENT_GUIDS_LIMIT]
+                
+                # Validators only move forward together with the items they describe
+                self.apply_validators(source, feed_data)
                 
                 await db.commit()
                 logger.info(f"Processados {new_items} novos itens para {source.name}")
                 
-                # Process AI categorization for new items
-                if new_items > 0:
-                    await self.process_ai_categorization(source_id)
+                # Hand new items to the AI queue; fetching never waits on LLM latency
+                if new_items > 0 and self.on_new_items:
+                    self.on_new_items()
+                
+                return new_items
                 
             except Exception as e:
-                logger.error(f"Erro ao processar source {source.name}: {e}")
-                source.last_error = str(e)
+                logger.error(f"Erro ao processar source {source_name}: {e}")
+                # Discard the half-done batch (and the new validators) before recording the error
+                await db.rollback()
+                await db.execute(
+                    update(RSSSource)
+                    .where(RSSSource.id == source_id)
+                    .values(last_error=str(e))
+                )
                 await db.commit()
+                return None
     
-    async def process_ai_categorization(self, source_id: str):
-        """Processar categorização AI para itens pendentes de um source"""
-        async with AsyncSessionLocal() as db:
-            # Get pending items
-            result = await db.execute(
-                select(RSSItem)
-                .where(
-                    RSSItem.source_id == source_id,
-                    RSSItem.ai_processing_status == "pending"
-                )
-                .limit(10)  # Process in batches
-            )
-            
-            pending_items = result.scalars().all()
-            
-            for item in pending_items:
-                try:
-                    # Update status to processing
-                    item.ai_processing_status = "processing"
-                    await db.commit()
-                    
-                    # Get AI categorization
-                    categorization = await self.ai_manager.categorize_content(
-                        item.title,
-                        item.description or "",
-                        item.content or ""
-                    )
-                    
-                    # Update item with AI results
-                    item.ai_summary = categorization.get("summary", "")
-                    item.ai_topic = categorization.get("topic", "")
-                    item.ai_subtopic = categorization.get("subtopic", "")
-                    item.ai_tags = categorization.get("tags", [])
-                    item.ai_sentiment = categorization.get("sentiment", "neutral")
-                    item.ai_importance_score = categorization.get("importance_score", 0.5)
-                    item.ai_processing_status = "completed"
-                    item.ai_processed_at = datetime.utcnow()
-                    item.ai_api_used = categorization.get("api_used", "")
-                    
-                    # Create/update topics
-                    await self.ensure_topic_exists(item.ai_topic, item.ai_subtopic, db)
-                    
-                    await db.commit()
-                    
-                    logger.info(f"Item categorizado: {item.title[:50]}... -> {item.ai_topic}/{item.ai_subtopic}")
-                    
-                except Exception as e:
-                    logger.error(f"Erro na categorização AI do item {item.id}: {e}")
-                    item.ai_processing_status = "failed"
-                    await db.commit()
+    def apply_validators(self, source: RSSSource, feed_data: dict):
+        """Gravar ETag / Last-Modified / hash do corpo para o próximo GET condicional"""
+        source.etag = feed_data["etag"]
+        source.last_modified = feed_data["last_modified"]
+        source.content_hash = feed_data["content_hash"]
     
-    async def ensure_topic_exists(self, topic_name: str, subtopic_name: str, db: AsyncSession):
-        """Garantir que tópico e subtópico existam no banco"""
-        if not topic_name:
-            return
+    async def insert_new_items(self, db: AsyncSession, source_id: str, candidates: Dict[str, dict]) -> int:
+        """Inserir em lote os itens cujo guid ainda não existe; retorna quantos foram inseridos"""
+        if not candidates:
+            return 0
         
-        # Check if main topic exists
-        topic_result = await db.execute(
-            select(Topic).where(
-                Topic.name == topic_name,
-                Topic.parent_topic_id.is_(None)
+        # Single batched lookup of the guids we already have
+        existing_result = await db.execute(
+            select(RSSItem.guid).where(
+                RSSItem.source_id == source_id,
+                RSSItem.guid.in_(list(candidates))
             )
         )
-        main_topic = topic_result.scalar_one_or_none()
+        existing_guids = set(existing_result.scalars().all())
+        rows = [row for guid, row in candidates.items() if guid not in existing_guids]
         
-        if not main_topic:
-            main_topic = Topic(
-                name=topic_name,
-                description=f"Tópico gerado automaticamente pela IA",
-                is_ai_generated=True
-            )
-            db.add(main_topic)
-            await db.flush()  # Get the ID
+        if not rows:
+            return 0
         
-        # Update topic item count
-        main_topic.item_count += 1
+        # Assign near-duplicate clusters (rows in the same batch can cluster together);
+        # simhashes were computed in the parse executor, only the index lookup runs here
+        for row in rows:
+            row["cluster_id"] = self.cluster_index.assign(row["id"], row["simhash"])
         
-        # Handle subtopic if provided
-        if subtopic_name and subtopic_name != topic_name:
-            subtopic_result = await db.execute(
-                select(Topic).where(
-                    Topic.name == subtopic_name,
-                    Topic.parent_topic_id == main_topic.id
-                )
+        # Bulk insert; the (source_id, guid) constraint drops rows inserted concurrently
+        insert_result = await db.execute(
+            pg_insert(RSSItem)
+            .on_conflict_do_nothing(index_elements=[RSSItem.source_id, RSSItem.guid])
+            .returning(RSSItem.id),
+            rows
+        )
+        inserted_ids = set(insert_result.scalars().all())
+        new_items = len(inserted_ids)
+        
+        for row in rows:
+            if row["id"] not in inserted_ids:
+                self.cluster_index.discard(row["id"])
+        
+        if new_items:
+            await db.execute(
+                update(RSSSource)
+                .where(RSSSource.id == source_id)
+                .values(total_items=RSSSource.total_items + new_items)
             )
-            subtopic = subtopic_result.scalar_one_or_none()
-            
-            if not subtopic:
-                subtopic = Topic(
-                    name=subtopic_name,
-                    parent_topic_id=main_topic.id,
-                    description=f"Subtópico de {topic_name} gerado pela IA",
-                    is_ai_generated=True
-                )
-                db.add(subtopic)
-                await db.flush()
-            
-            subtopic.item_count += 1
+        
+        return new_items
+    
+    async def ensure_topic_exists(self, topic_name: str, subtopic_name: str, db: AsyncSession):
+        """Garantir que tópico e subtópico existam no banco"""
+        await self.ensure_topics_exist([(topic_name, subtopic_name)], db)
+    
+    async def ensure_topics_exist(self, pairs: List[Tuple[str, str]], db: AsyncSession):
+        """Criar/contar tópicos de um lote de itens categorizados em O(1) idas ao banco"""
+        await self.topic_cache.apply_counts(db, pairs)
     
     async def process_all_feeds(self):
         """Processar todos os feeds RSS ativos"""
@@ -280,31 +305,43 @@ class RSSProcessor:
             now = datetime.utcnow()
             
             result = await db.execute(
-                select(RSSSource)
+                select(RSSSource.id, RSSSource.url)
                 .where(
                     RSSSource.is_active == True,
                     (RSSSource.last_fetched.is_(None) | 
-                     (RSSSource.last_fetched < now - timedelta(seconds=RSSSource.fetch_interval)))
+                     (RSSSource.last_fetched + func.make_interval(0, 0, 0, 0, 0, 0, RSSSource.fetch_interval) < now))
                 )
             )
             
-            sources = result.scalars().all()
-            logger.info(f"Processando {len(sources)} feeds RSS")
-            
-            # Process sources in parallel (but limited)
-            semaphore = asyncio.Semaphore(3)  # Max 3 concurrent processing
-            
-            async def process_with_semaphore(source_id):
-                async with semaphore:
-                    await self.process_source(source_id)
-            
-            # Create tasks for all sources
-            tasks = [process_with_semaphore(source.id) for source in sources]
-            
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
-            
-            logger.info("Processamento de feeds RSS concluído")
+            sources = result.all()
+        
+        logger.info(f"Processando {len(sources)} feeds RSS")
+        
+        # Interleave hosts so one big domain can't hold every slot while waiting on its per-host limit
+        by_host: Dict[str, List[str]] = {}
+        for source_id, url in sources:
+            by_host.setdefault(get_host(url), []).append(source_id)
+        
+        ordered_ids = []
+        queues = list(by_host.values())
+        while queues:
+            ordered_ids.extend(queue.pop(0) for queue in queues)
+            queues = [queue for queue in queues if queue]
+        
+        # Concurrency is bounded by the fetcher's global and per-host limits
+        semaphore = asyncio.Semaphore(self.fetcher.global_limit)
+        
+        async def process_with_semaphore(source_id):
+            async with semaphore:
+                await self.process_source(source_id)
+        
+        # Create tasks for all sources
+        tasks = [process_with_semaphore(source_id) for source_id in ordered_ids]
+        
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        logger.info("Processamento de feeds RSS concluído")
     
     async def get_processing_stats(self) -> dict:
         """Obter estatísticas de processamento"""
@@ -339,5 +376,16 @@ class RSSProcessor:
                 "total_items": total_items,
                 "processed_items": processed_items,
                 "pending_items": pending_items,
-                "processing_rate": processed_items / total_items if total_items > 0 else 0
-            }
\ No newline at end of file
+                "processing_rate": processed_items / total_items if total_items > 0 else 0,
+                "timing": self.get_timing_stats(),
+                "fetcher": self.fetcher.get_stats(),
+                "clusters": self.cluster_index.get_stats()
+            }
+    
+    def get_timing_stats(self) -> dict:
+        """Tempo gasto esperando a rede versus parseando feeds"""
+        return {
+            "fetch_count": self.fetch_count,
+            "fetch_seconds": round(self.fetch_seconds, 3),
+            "parse": self.parse_executor.get_stats()
+        }
\ No newline at end of file
@@ -0,0 +1,86 @@
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Orçamento de cold start (importar main), em segundos
+STARTUP_IMPORT_BUDGET = float(os.getenv("STARTUP_IMPORT_BUDGET", "3.0"))
+
+# Módulos que só podem ser carregados quando um caminho de código precisa deles
+LAZY_MODULES = ("transformers", "torch", "openai", "feedparser")
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+class StartupTimer:
+    """Duração de cada fase da inicialização, exposta em /health/startup"""
+
+    def __init__(self, import_seconds: Optional[float] = None):
+        self.phases: Dict[str, float] = {}
+        if import_seconds is not None:
+            self.phases["imports"] = import_seconds
+        self.ready_at: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+            logger.info(f"Startup: {name} em {self.phases[name]:.3f}s")
+
+    def mark_ready(self):
+        self.ready_at = time.time()
+
+    def get_stats(self) -> dict:
+        total = sum(self.phases.values())
+        return {
+            "ready": self.ready_at is not None,
+            "total_seconds": round(total, 3),
+            "phases": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            "import_budget_seconds": STARTUP_IMPORT_BUDGET,
+            "within_budget": self.phases.get("imports", 0.0) <= STARTUP_IMPORT_BUDGET,
+            "lazy_modules_loaded": [name for name in LAZY_MODULES if name in sys.modules]
+        }
+
+
+def measure_imports(module: str = "main") -> Tuple[float, List[Tuple[str, float, float]]]:
+    """Importar o módulo num interpretador novo com -X importtime.
+
+    Retorna (segundos totais, [(módulo, próprio, cumulativo), ...]).
+    """
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True
+    )
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {module}:\n{completed.stderr[-2000:]}")
+
+    modules = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            modules.append((name, int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    return elapsed, modules
+
+
+def print_import_report(top: int = 25):
+    """--import-report: módulos mais caros para importar main"""
+    elapsed, modules = measure_imports()
+    print(f"Cold start (python -c 'import main'): {elapsed:.3f}s")
+    print(f"{'cumulativo':>11} {'próprio':>9}  módulo")
+    for name, self_seconds, cumulative in sorted(modules, key=lambda m: m[2], reverse=True)[:top]:
+        print(f"{cumulative:>10.3f}s {self_seconds:>8.3f}s  {name}")
+
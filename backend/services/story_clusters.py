@@ -0,0 +1,177 @@
+import hashlib
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Distância de Hamming máxima entre SimHashes do mesmo acontecimento.
+# Com 4 bandas de 16 bits, até 3 bits diferentes garantem uma banda idêntica.
+CLUSTER_MAX_DISTANCE = min(3, int(os.getenv("FEED_CLUSTER_MAX_DISTANCE", "3")))
+
+# Janela de itens mantida no índice (notícias repetidas chegam em poucos dias)
+CLUSTER_WINDOW_DAYS = int(os.getenv("FEED_CLUSTER_WINDOW_DAYS", "3"))
+CLUSTER_MAX_ENTRIES = int(os.getenv("FEED_CLUSTER_MAX_ENTRIES", "1000000"))
+
+# Textos com menos tokens que isso não são agrupados (falsos positivos demais)
+CLUSTER_MIN_TOKENS = 4
+
+SIMHASH_BITS = 64
+BANDS = 4
+BAND_BITS = SIMHASH_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_TOKEN_RE = re.compile(r"\w{3,}")
+
+
+def _to_signed(value: int) -> int:
+    """SimHash sem sinal -> BIGINT do PostgreSQL"""
+    return value - (1 << SIMHASH_BITS) if value >= (1 << (SIMHASH_BITS - 1)) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value & ((1 << SIMHASH_BITS) - 1)
+
+
+def simhash(title: str, description: str = "") -> Optional[int]:
+    """SimHash de 64 bits (com sinal) sobre título e descrição; None se o texto for curto demais"""
+    text = _TAG_RE.sub(" ", f"{title or ''} {description or ''}").lower()
+    tokens = _TOKEN_RE.findall(text)
+    if len(tokens) < CLUSTER_MIN_TOKENS:
+        return None
+
+    # Unigramas e bigramas: bigramas tornam o hash sensível à ordem das palavras
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+
+    value = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            value |= 1 << bit
+    return _to_signed(value)
+
+
+def _bands(value: int) -> List[Tuple[int, int]]:
+    return [(band, (value >> (band * BAND_BITS)) & BAND_MASK) for band in range(BANDS)]
+
+
+class StoryClusterIndex:
+    """Índice LSH em memória (4 bandas x 16 bits) de SimHashes recentes -> cluster_id.
+
+    Itens saem do índice ao passar de CLUSTER_WINDOW_DAYS ou, acima de
+    max_entries, do mais antigo para o mais novo.
+    """
+
+    def __init__(self, max_entries: int = CLUSTER_MAX_ENTRIES, window_days: int = CLUSTER_WINDOW_DAYS):
+        self.max_entries = max(1, max_entries)
+        self.window = timedelta(days=window_days)
+        # (banda, valor da banda) -> ids dos itens
+        self._buckets: Dict[Tuple[int, int], List[str]] = {}
+        # id do item -> (simhash, cluster_id, criado em), em ordem de inserção
+        self._entries: "OrderedDict[str, Tuple[int, str, datetime]]" = OrderedDict()
+        self.evicted = 0
+        self.lookups = 0
+        self.matches = 0
+        self.lookup_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def find(self, value: int) -> Optional[str]:
+        """cluster_id do item indexado mais próximo dentro de CLUSTER_MAX_DISTANCE"""
+        started = time.perf_counter()
+        value = _to_unsigned(value)
+        best: Optional[Tuple[int, str]] = None
+        for key in _bands(value):
+            for item_id in self._buckets.get(key, ()):
+                other, cluster_id, _ = self._entries[item_id]
+                distance = bin(value ^ other).count("1")
+                if distance <= CLUSTER_MAX_DISTANCE and (best is None or distance < best[0]):
+                    best = (distance, cluster_id)
+        self.lookups += 1
+        self.lookup_seconds += time.perf_counter() - started
+        if best is None:
+            return None
+        self.matches += 1
+        return best[1]
+
+    def add(self, item_id: str, value: int, cluster_id: str, created_at: Optional[datetime] = None):
+        if item_id in self._entries:
+            return
+        value = _to_unsigned(value)
+        self._entries[item_id] = (value, cluster_id, created_at or datetime.utcnow())
+        for key in _bands(value):
+            self._buckets.setdefault(key, []).append(item_id)
+        self.evict()
+
+    def evict(self, now: Optional[datetime] = None):
+        """Remover os itens mais antigos que a janela e o excedente de max_entries"""
+        cutoff = (now or datetime.utcnow()) - self.window
+        while self._entries:
+            item_id, (_, _, created_at) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_entries and created_at >= cutoff:
+                break
+            self.discard(item_id)
+            self.evicted += 1
+
+    def discard(self, item_id: str):
+        entry = self._entries.pop(item_id, None)
+        if entry is None:
+            return
+        for key in _bands(entry[0]):
+            bucket = self._buckets.get(key)
+            if bucket:
+                try:
+                    bucket.remove(item_id)
+                except ValueError:
+                    pass
+                if not bucket:
+                    del self._buckets[key]
+
+    def assign(self, item_id: str, value: Optional[int]) -> str:
+        """Indexar o item e devolver seu cluster_id (o próprio id se for uma história nova)"""
+        if value is None:
+            return item_id
+        self.evict()
+        cluster_id = self.find(value) or item_id
+        self.add(item_id, value, cluster_id)
+        return cluster_id
+
+    async def load(self):
+        """Carregar os itens da janela recente (na inicialização)"""
+        # Import local: simhash() também roda nos processos de parsing, que não usam o banco
+        from sqlalchemy import select
+        from database import AsyncSessionLocal, RSSItem
+
+        cutoff = datetime.utcnow() - timedelta(days=CLUSTER_WINDOW_DAYS)
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(
+                select(RSSItem.id, RSSItem.simhash, RSSItem.cluster_id, RSSItem.created_at)
+                .where(RSSItem.simhash.is_not(None), RSSItem.created_at >= cutoff)
+                .order_by(RSSItem.created_at)
+                .execution_options(yield_per=10000)
+            )
+            async for item_id, value, cluster_id, created_at in result:
+                self.add(item_id, value, cluster_id or item_id, created_at)
+        logger.info(f"Índice de clusters carregado com {len(self)} itens")
+
+    def get_stats(self) -> dict:
+        return {
+            "indexed_items": len(self._entries),
+            "max_entries": self.max_entries,
+            "window_days": self.window.days,
+            "evicted": self.evicted,
+            "buckets": len(self._buckets),
+            "lookups": self.lookups,
+            "matches": self.matches,
+            "avg_lookup_us": round(self.lookup_seconds / self.lookups * 1e6, 2) if self.lookups else 0.0
+        }
@@ -0,0 +1,104 @@
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+from uuid import uuid4
+from sqlalchemy import bindparam, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import Topic
+
+logger = logging.getLogger(__name__)
+
+TOPIC_NAME_LENGTH = 100
+
+
+def clean_topic_name(name: Optional[str]) -> str:
+    """Nome de tópico como gravado em topics.name e rss_items.ai_topic/ai_subtopic"""
+    return (name or "").strip()[:TOPIC_NAME_LENGTH]
+
+
+class TopicCache:
+    """Cache nome -> id dos tópicos do processo e contadores aplicados em lote"""
+
+    def __init__(self):
+        # Atualizado pelo RETURNING de cada upsert; tópicos não são removidos nem renomeados
+        self._ids: Dict[str, str] = {}
+
+    async def apply_counts(self, db: AsyncSession, pairs: Iterable[Tuple[Optional[str], Optional[str]]]):
+        """Criar tópicos/subtópicos que faltam e somar item_count de um lote inteiro.
+
+        Um único INSERT ... ON CONFLICT (name) DO UPDATE com principais e
+        subtópicos ordenados juntos por nome, para que workers concorrentes
+        travem as linhas sempre na mesma ordem, mesmo quando um nome é principal
+        num lote e subtópico em outro. O parent_topic_id de um subtópico novo vem
+        do cache; se o pai ainda não era conhecido, um UPDATE posterior o
+        preenche a partir do RETURNING, tocando só as linhas recém-inseridas.
+        """
+        counts: Counter = Counter()
+        parents: Dict[str, Optional[str]] = {}
+
+        for topic_name, subtopic_name in pairs:
+            topic_name = clean_topic_name(topic_name)
+            subtopic_name = clean_topic_name(subtopic_name)
+            if not topic_name:
+                continue
+            counts[topic_name] += 1
+            parents[topic_name] = None
+            if subtopic_name and subtopic_name != topic_name:
+                counts[subtopic_name] += 1
+                # Nomes são únicos: principal no lote prevalece; senão vale o primeiro pai visto
+                parents.setdefault(subtopic_name, topic_name)
+
+        if not counts:
+            return
+
+        now = datetime.utcnow()
+        rows = []
+        for name in sorted(counts):
+            parent = parents[name]
+            rows.append({
+                "id": str(uuid4()),
+                "name": name,
+                "parent_topic_id": self._ids.get(parent) if parent else None,
+                "description": (
+                    f"Subtópico de {parent} gerado pela IA" if parent
+                    else "Tópico gerado automaticamente pela IA"
+                ),
+                "item_count": counts[name],
+                "is_ai_generated": True,
+                "created_at": now,
+                "updated_at": now
+            })
+
+        statement = pg_insert(Topic).values(rows)
+        result = await db.execute(
+            statement
+            .on_conflict_do_update(
+                index_elements=[Topic.name],
+                set_={
+                    "item_count": Topic.item_count + statement.excluded.item_count,
+                    "updated_at": now
+                }
+            )
+            .returning(Topic.name, Topic.id, literal_column("xmax = 0").label("inserted"))
+        )
+        inserted = set()
+        for name, topic_id, was_inserted in result.all():
+            self._ids[name] = topic_id
+            if was_inserted:
+                inserted.add(name)
+
+        orphans = [
+            {"topic_id": self._ids[row["name"]], "parent_id": self._ids[parents[row["name"]]]}
+            for row in rows
+            if row["name"] in inserted and parents[row["name"]] and row["parent_topic_id"] is None
+        ]
+        if orphans:
+            table = Topic.__table__
+            await db.execute(
+                table.update()
+                .where(table.c.id == bindparam("topic_id"))
+                .values(parent_topic_id=bindparam("parent_id")),
+                orphans
+            )
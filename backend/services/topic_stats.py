@@ -0,0 +1,177 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, func, literal, union_all, and_, case, text, JSON
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import AsyncSessionLocal, RSSItem, Topic, TopicStat
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_SENTIMENT = "unknown"
+RECENT_WINDOW = timedelta(days=1)
+
+TOPIC_SCOPE = "topic"
+SUBTOPIC_SCOPE = "subtopic"
+
+StatKey = Tuple[str, str, str]
+
+
+def _importance(value) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _accumulate(totals: Dict[StatKey, List[float]], key: StatKey, importance, sign: int = 1):
+    entry = totals[key]
+    entry[0] += sign
+    if importance is not None:
+        entry[1] += sign * importance
+        entry[2] += sign
+
+
+async def _upsert(db: AsyncSession, totals: Dict[StatKey, List[float]]):
+    """Somar deltas ao rollup; chaves ordenadas para workers concorrentes travarem na mesma ordem"""
+    if not totals:
+        return
+    statement = pg_insert(TopicStat).values([
+        {
+            "scope": scope,
+            "name": name,
+            "sentiment": sentiment,
+            "item_count": int(count),
+            "importance_sum": importance_sum,
+            "importance_count": int(importance_count)
+        }
+        for (scope, name, sentiment), (count, importance_sum, importance_count) in sorted(totals.items())
+    ])
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[TopicStat.scope, TopicStat.name, TopicStat.sentiment],
+            set_={
+                "item_count": TopicStat.item_count + statement.excluded.item_count,
+                "importance_sum": TopicStat.importance_sum + statement.excluded.importance_sum,
+                "importance_count": TopicStat.importance_count + statement.excluded.importance_count
+            }
+        )
+    )
+
+
+async def add_categorized_items(db: AsyncSession, categorizations: Iterable[dict]):
+    """Registrar itens recém-categorizados (mesma transação que grava os itens)"""
+    totals: Dict[StatKey, List[float]] = defaultdict(lambda: [0, 0.0, 0])
+    for categorization in categorizations:
+        sentiment = categorization.get("sentiment") or UNKNOWN_SENTIMENT
+        importance = _importance(categorization.get("importance_score"))
+        if categorization.get("topic"):
+            _accumulate(totals, (TOPIC_SCOPE, categorization["topic"], sentiment), importance)
+        if categorization.get("subtopic"):
+            _accumulate(totals, (SUBTOPIC_SCOPE, categorization["subtopic"], sentiment), importance)
+    await _upsert(db, totals)
+
+
+async def remove_source_items(db: AsyncSession, source_id: str):
+    """Descontar os itens de um source antes de removê-lo (CASCADE apaga os itens)"""
+    totals: Dict[StatKey, List[float]] = defaultdict(lambda: [0, 0.0, 0])
+    for scope, column in ((TOPIC_SCOPE, RSSItem.ai_topic), (SUBTOPIC_SCOPE, RSSItem.ai_subtopic)):
+        sentiment = func.coalesce(RSSItem.ai_sentiment, UNKNOWN_SENTIMENT)
+        result = await db.execute(
+            select(
+                column,
+                sentiment,
+                func.count(RSSItem.id),
+                func.coalesce(func.sum(RSSItem.ai_importance_score), 0.0),
+                func.count(RSSItem.ai_importance_score)
+            )
+            .where(RSSItem.source_id == source_id, column.is_not(None), column != "")
+            .group_by(column, sentiment)
+        )
+        for name, sentiment_value, count, importance_sum, importance_count in result.all():
+            totals[(scope, name, sentiment_value)] = [-count, -importance_sum, -importance_count]
+    await _upsert(db, totals)
+
+
+async def rebuild_topic_stats(db: AsyncSession):
+    """Recalcular o rollup inteiro a partir de rss_items.
+
+    EXCLUSIVE bloqueia os upserts de add_categorized_items/remove_source_items
+    (leituras continuam) até o commit de quem chamou: transações que já
+    escreveram deltas terminam antes do DELETE, e as que ainda não escreveram
+    esperam e aplicam o delta sobre o rollup novo, sem contagem dupla nem perdida.
+    """
+    await db.execute(text(f"LOCK TABLE {TopicStat.__tablename__} IN EXCLUSIVE MODE"))
+    await db.execute(TopicStat.__table__.delete())
+    for scope, column in ((TOPIC_SCOPE, RSSItem.ai_topic), (SUBTOPIC_SCOPE, RSSItem.ai_subtopic)):
+        sentiment = func.coalesce(RSSItem.ai_sentiment, UNKNOWN_SENTIMENT)
+        await db.execute(
+            pg_insert(TopicStat).from_select(
+                ["scope", "name", "sentiment", "item_count", "importance_sum", "importance_count"],
+                select(
+                    literal(scope),
+                    column,
+                    sentiment,
+                    func.count(RSSItem.id),
+                    func.coalesce(func.sum(RSSItem.ai_importance_score), 0.0),
+                    func.count(RSSItem.ai_importance_score)
+                )
+                .where(column.is_not(None), column != "")
+                .group_by(column, sentiment)
+            )
+        )
+
+
+async def ensure_topic_stats():
+    """Na inicialização: construir o rollup se estiver vazio e já houver itens categorizados"""
+    async with AsyncSessionLocal() as db:
+        has_stats = await db.scalar(select(TopicStat.name).limit(1))
+        if has_stats is not None:
+            return
+        has_items = await db.scalar(select(RSSItem.id).where(RSSItem.ai_topic.is_not(None)).limit(1))
+        if has_items is None:
+            return
+        logger.info("Construindo rollup topic_stats a partir de rss_items")
+        await rebuild_topic_stats(db)
+        await db.commit()
+
+
+def topic_stats_query():
+    """Tópicos com rollup e contagem das últimas 24h numa única consulta"""
+    topic_scope = case((Topic.parent_topic_id.is_(None), TOPIC_SCOPE), else_=SUBTOPIC_SCOPE)
+
+    rollup = (
+        select(
+            TopicStat.scope,
+            TopicStat.name,
+            func.sum(TopicStat.importance_sum).label("importance_sum"),
+            func.sum(TopicStat.importance_count).label("importance_count"),
+            func.json_object_agg(TopicStat.sentiment, TopicStat.item_count, type_=JSON)
+            .filter(TopicStat.item_count > 0)
+            .label("sentiment_distribution")
+        )
+        .group_by(TopicStat.scope, TopicStat.name)
+        .subquery()
+    )
+
+    cutoff = datetime.utcnow() - RECENT_WINDOW
+    recent = union_all(
+        select(literal(TOPIC_SCOPE).label("scope"), RSSItem.ai_topic.label("name"), func.count(RSSItem.id).label("recent_items"))
+        .where(RSSItem.created_at >= cutoff, RSSItem.ai_topic.is_not(None))
+        .group_by(RSSItem.ai_topic),
+        select(literal(SUBTOPIC_SCOPE), RSSItem.ai_subtopic, func.count(RSSItem.id))
+        .where(RSSItem.created_at >= cutoff, RSSItem.ai_subtopic.is_not(None))
+        .group_by(RSSItem.ai_subtopic)
+    ).subquery()
+
+    return (
+        select(
+            Topic,
+            func.coalesce(recent.c.recent_items, 0).label("recent_items"),
+            func.coalesce(
+                rollup.c.importance_sum / func.nullif(rollup.c.importance_count, 0),
+                0.0
+            ).label("avg_importance"),
+            rollup.c.sentiment_distribution
+        )
+        .outerjoin(rollup, and_(rollup.c.scope == topic_scope, rollup.c.name == Topic.name))
+        .outerjoin(recent, and_(recent.c.scope == topic_scope, recent.c.name == Topic.name))
+    )
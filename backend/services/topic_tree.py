@@ -0,0 +1,48 @@
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar
+
+Node = TypeVar("Node")
+
+
+def build_topic_tree(
+    topics: Sequence,
+    make_node: Callable[[object, List[Node]], Node],
+    include: Optional[Callable[[object], bool]] = None
+) -> List[Node]:
+    """Montar a árvore de tópicos em uma passada, com índice parent_topic_id -> filhos.
+
+    A ordem dos irmãos é a ordem de `topics` (a do ORDER BY da consulta).
+    Tópicos rejeitados por `include` são podados junto com a subárvore, e
+    tópicos cujo pai não existe (ou ciclos) ficam de fora, como antes.
+    Profundidade arbitrária, sem recursão.
+    """
+    roots = []
+    children: Dict[str, list] = defaultdict(list)
+    for topic in topics:
+        if include is not None and not include(topic):
+            continue
+        if topic.parent_topic_id is None:
+            roots.append(topic)
+        else:
+            children[topic.parent_topic_id].append(topic)
+
+    # Pós-ordem iterativa: cada nó é criado depois dos filhos
+    built: Dict[str, Node] = {}
+    visited = set()
+    stack = [(topic, False) for topic in reversed(roots)]
+    while stack:
+        topic, expanded = stack.pop()
+        if expanded:
+            built[topic.id] = make_node(
+                topic,
+                [built[child.id] for child in children.get(topic.id, ()) if child.id in built]
+            )
+            continue
+        if topic.id in visited:
+            continue
+        visited.add(topic.id)
+        stack.append((topic, True))
+        stack.extend((child, False) for child in reversed(children.get(topic.id, ())))
+
+    return [built[topic.id] for topic in roots]
+
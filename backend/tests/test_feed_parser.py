@@ -0,0 +1,118 @@
+import pytest
+from services.feed_parser import generate_item_guid, parse_feed, parse_feed_incremental
+
+SOURCE_ID = "source-1"
+
+RSS_NEWEST_FIRST = b"""<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/"
+     xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel>
+  <title>Feed</title>
+  <item>
+    <title>Novo com dc:date</title>
+    <guid isPermaLink="true">https://example.com/novo</guid>
+    <dc:date>2026-10-16T10:00:00Z</dc:date>
+    <dc:creator>Ana</dc:creator>
+    <description>&lt;p onclick="x()"&gt;resumo&lt;script&gt;alert(1)&lt;/script&gt;&lt;/p&gt;</description>
+    <content:encoded><![CDATA[<b>texto</b><script>evil()</script><iframe src="x"></iframe>]]></content:encoded>
+  </item>
+  <item>
+    <title>Novo com pubDate</title>
+    <link>https://example.com/pubdate</link>
+    <guid isPermaLink="false">pub-1</guid>
+    <pubDate>Fri, 16 Oct 2026 09:00:00 +0000</pubDate>
+    <description>Texto &amp; entidades</description>
+  </item>
+  <item><title>Antigo 1</title><guid>old-1</guid><pubDate>Thu, 15 Oct 2026 09:00:00 +0000</pubDate></item>
+  <item><title>Antigo 2</title><guid>old-2</guid><pubDate>Wed, 14 Oct 2026 09:00:00 +0000</pubDate></item>
+  <item><title>Antigo 3</title><guid>old-3</guid><pubDate>Tue, 13 Oct 2026 09:00:00 +0000</pubDate></item>
+  <item><title>Antigo 4</title><guid>old-4</guid><pubDate>Mon, 12 Oct 2026 09:00:00 +0000</pubDate></item>
+</channel>
+</rss>"""
+
+RSS_OLDEST_FIRST = b"""<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0"><channel><title>Feed</title>
+  <item><title>Antigo 1</title><guid>old-1</guid><pubDate>Mon, 12 Oct 2026 09:00:00 +0000</pubDate></item>
+  <item><title>Antigo 2</title><guid>old-2</guid><pubDate>Tue, 13 Oct 2026 09:00:00 +0000</pubDate></item>
+  <item><title>Antigo 3</title><guid>old-3</guid><pubDate>Wed, 14 Oct 2026 09:00:00 +0000</pubDate></item>
+  <item><title>Novo</title><guid>new-1</guid><pubDate>Fri, 16 Oct 2026 09:00:00 +0000</pubDate></item>
+</channel></rss>"""
+
+ATOM_NEWEST_FIRST = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Feed</title>
+  <entry>
+    <id>urn:new-1</id>
+    <title>Novo so com updated</title>
+    <link rel="alternate" href="https://example.com/atom-novo"/>
+    <updated>2026-10-16T10:00:00Z</updated>
+    <author><name>Bia</name></author>
+    <summary type="html">&lt;em&gt;resumo&lt;/em&gt;&lt;script&gt;x()&lt;/script&gt;</summary>
+    <content type="xhtml"><div xmlns="http://www.w3.org/1999/xhtml"><p>corpo</p></div></content>
+  </entry>
+  <entry><id>urn:old-1</id><title>Antigo 1</title><published>2026-10-15T10:00:00Z</published></entry>
+  <entry><id>urn:old-2</id><title>Antigo 2</title><published>2026-10-14T10:00:00Z</published></entry>
+  <entry><id>urn:old-3</id><title>Antigo 3</title><published>2026-10-13T10:00:00Z</published></entry>
+</feed>"""
+
+RDF_NEWEST_FIRST = b"""<?xml version="1.0" encoding="utf-8"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/"
+         xmlns:dc="http://purl.org/dc/elements/1.1/">
+  <channel rdf:about="https://example.com/"><title>Feed</title></channel>
+  <item rdf:about="https://example.com/rdf-novo">
+    <title>Novo RDF</title><link>https://example.com/rdf-novo</link>
+    <description>resumo rdf</description><dc:date>2026-10-16T10:00:00Z</dc:date>
+  </item>
+  <item rdf:about="https://example.com/old-1"><title>Antigo 1</title><link>https://example.com/old-1</link><dc:date>2026-10-15T10:00:00Z</dc:date></item>
+  <item rdf:about="https://example.com/old-2"><title>Antigo 2</title><link>https://example.com/old-2</link><dc:date>2026-10-14T10:00:00Z</dc:date></item>
+  <item rdf:about="https://example.com/old-3"><title>Antigo 3</title><link>https://example.com/old-3</link><dc:date>2026-10-13T10:00:00Z</dc:date></item>
+</rdf:RDF>"""
+
+
+def _guid(entry) -> str:
+    return entry["id"] or generate_item_guid(SOURCE_ID, entry["title"], entry["link"])
+
+
+def _known_old(content: bytes):
+    """Guids dos entries "Antigo N", como parse_feed os calcula"""
+    return [_guid(entry) for entry in parse_feed(content)["entries"] if entry["title"].startswith("Antigo")]
+
+
+@pytest.mark.parametrize("content", [RSS_NEWEST_FIRST, ATOM_NEWEST_FIRST, RDF_NEWEST_FIRST], ids=["rss", "atom", "rdf"])
+def test_incremental_entries_match_full_parse(content):
+    full = [entry for entry in parse_feed(content)["entries"] if not entry["title"].startswith("Antigo")]
+    result = parse_feed_incremental(content, SOURCE_ID, _known_old(content))
+
+    assert result.get("stopped_early")
+    assert result["entries"] == full
+
+
+def test_incremental_html_is_sanitized():
+    entry = parse_feed_incremental(RSS_NEWEST_FIRST, SOURCE_ID, _known_old(RSS_NEWEST_FIRST))["entries"][0]
+
+    assert "script" not in entry["summary"] and "onclick" not in entry["summary"]
+    assert "script" not in entry["content"] and "iframe" not in entry["content"]
+    assert entry["link"] == "https://example.com/novo"
+    assert entry["published_at"] is not None
+
+
+def test_oldest_first_feed_is_parsed_to_the_end():
+    known = _known_old(RSS_OLDEST_FIRST)
+    result = parse_feed_incremental(RSS_OLDEST_FIRST, SOURCE_ID, known)
+
+    assert not result.get("stopped_early")
+    assert "new-1" in [entry["id"] for entry in result["entries"]]
+
+
+def test_undated_feed_is_parsed_to_the_end():
+    content = RSS_NEWEST_FIRST.replace(b"pubDate", b"lastSeen").replace(b"dc:date", b"dc:coverage")
+    result = parse_feed_incremental(content, SOURCE_ID, _known_old(content))
+
+    assert not result.get("stopped_early")
+    assert len(result["entries"]) == 6
+
+
+def test_malformed_feed_falls_back_to_full_parse():
+    result = parse_feed_incremental(b"<rss><channel><item><title>x</title>", SOURCE_ID, ["a"])
+
+    assert not result.get("incremental")
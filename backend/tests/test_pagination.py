@@ -0,0 +1,66 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from database import RSSItem
+from services.pagination import IMPORTANCE_KEYSET, RECENCY_KEYSET
+
+NOW = "2026-01-01T12:00:00.123456"
+
+
+def _cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    item = RSSItem(
+        id="item-1", ai_importance_score=None, published_at=None,
+        created_at=datetime.fromisoformat(NOW)
+    )
+    values = IMPORTANCE_KEYSET.decode(IMPORTANCE_KEYSET.encode(item))
+    assert values == [-1.0, datetime.fromisoformat(NOW), datetime.fromisoformat(NOW), "item-1"]
+
+
+@pytest.mark.parametrize("payload", [
+    ["x", 1],
+    ["recency", NOW, NOW, "item-1"],
+    ["importance", "0.5", NOW, NOW, "item-1"],
+    ["importance", True, NOW, NOW, "item-1"],
+    ["importance", None, NOW, NOW, "item-1"],
+    ["importance", 0.5, 1700000000, NOW, "item-1"],
+    ["importance", 0.5, "ontem", NOW, "item-1"],
+    ["importance", 0.5, NOW, NOW, 42],
+    {"importance": 0.5},
+])
+def test_tampered_cursor_is_rejected(payload):
+    with pytest.raises(HTTPException) as error:
+        IMPORTANCE_KEYSET.decode(_cursor(payload))
+    assert error.value.status_code == 400
+
+
+def test_invalid_base64_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        RECENCY_KEYSET.decode("%%%")
+    assert error.value.status_code == 400
+
+
+def test_importance_order_puts_null_keys_by_fallback():
+    """Sem importância vai para o fim; sem published_at ordena por created_at"""
+    def item(item_id, importance, published_at, created_at="2026-01-01T09:00:00"):
+        return RSSItem(
+            id=item_id, ai_importance_score=importance,
+            published_at=datetime.fromisoformat(published_at) if published_at else None,
+            created_at=datetime.fromisoformat(created_at)
+        )
+
+    items = [
+        item("uncategorized", None, "2026-01-01T12:00:00"),
+        item("dated", 0.2, "2026-01-01T10:00:00"),
+        item("undated", 0.2, None, created_at="2026-01-01T11:00:00"),
+        item("important", 0.9, "2026-01-01T08:00:00"),
+    ]
+    ordered = sorted(items, key=lambda entry: IMPORTANCE_KEYSET.decode(IMPORTANCE_KEYSET.encode(entry)), reverse=True)
+
+    assert [entry.id for entry in ordered] == ["important", "undated", "dated", "uncategorized"]
@@ -0,0 +1,48 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from services.provider_clients import ProviderClientCache
+
+UPDATED_AT = datetime(2026, 10, 16, 10, 0, 0)
+
+
+def _api(updated_at=UPDATED_AT):
+    return SimpleNamespace(id="api-1", updated_at=updated_at)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_session():
+    cache = ProviderClientCache()
+    sessions = await asyncio.gather(*(cache.get_session(_api()) for _ in range(10)))
+
+    assert len({id(session) for session in sessions}) == 1
+    assert cache.created == 1
+    await cache.close_all()
+
+
+@pytest.mark.asyncio
+async def test_stale_version_reuses_newer_client():
+    cache = ProviderClientCache()
+    newer = await cache.get_session(_api())
+    stale = await cache.get_session(_api(UPDATED_AT - timedelta(minutes=5)))
+
+    assert stale is newer and not newer.closed
+    assert cache.get_stats()["retiring_clients"] == 0
+    await cache.close_all()
+
+
+@pytest.mark.asyncio
+async def test_replaced_client_stays_open_for_in_flight_calls():
+    cache = ProviderClientCache()
+    old = await cache.get_session(_api())
+    new = await cache.get_session(_api(UPDATED_AT + timedelta(minutes=5)))
+    await asyncio.sleep(0)
+
+    assert new is not old
+    assert not old.closed
+    assert cache.get_stats()["retiring_clients"] == 1
+
+    await cache.close_all()
+    assert old.closed and new.closed
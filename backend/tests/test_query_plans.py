@@ -0,0 +1,255 @@
+import asyncio
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event, select, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+import database
+from database import AsyncSessionLocal, RSSSource, RSSItem, Topic, _run_migrations
+
+# Postgres descartável: as tabelas precisam estar vazias, são semeadas e depois truncadas
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="TEST_DATABASE_URL não definido (Postgres descartável para EXPLAIN)"
+)
+
+# Volume semeado: suficiente para o planner preferir os índices a um Seq Scan
+SEED_SOURCES = 60
+SEED_SITES = 12
+SEED_ITEMS = 60000
+SEED_DAYS = 365
+SEED_MAIN_TOPICS = 20
+SEED_SUBTOPICS_PER_TOPIC = 5
+
+SENTIMENTS = ("positive", "negative", "neutral")
+
+# (caminho, Seq Scan em rss_items permitido) — agregados sobre a tabela inteira podem varrer
+ENDPOINTS = [
+    ("/api/feeds/timeline?limit=50", False),
+    ("/api/feeds/timeline?limit=50&cursor={cursor}", False),
+    ("/api/feeds/timeline?limit=50&bookmarked_only=true", False),
+    ("/api/feeds/timeline?limit=50&collapse_clusters=true", False),
+    ("/api/feeds/by-topics/{topic_id}/items?limit=50", False),
+    ("/api/feeds/by-topics/{subtopic_id}/items?limit=50", False),
+    ("/api/feeds/by-topics", False),
+    ("/api/feeds/by-sites", False),
+    ("/api/feeds/by-sites/{site}/items?limit=50", False),
+    ("/api/rss/sources/{source_id}/items?limit=50", False),
+    ("/api/topics/", False),
+    ("/api/topics/hierarchy", False),
+    ("/api/topics/trending?days=7", False),
+    ("/api/topics/sentiment-analysis?days=7", False),
+    ("/api/topics/word-cloud?days=7", False),
+    ("/api/feeds/search?q=item", False),
+    ("/api/feeds/search?q=12345&sort=recent", False),
+    ("/api/feeds/timeline?limit=50&topic=pico%201", False),
+    ("/api/feeds/stats", True),
+]
+
+
+def _find_index_names(plan: dict) -> List[str]:
+    """Índices usados em qualquer nível do plano"""
+    found = [plan["Index Name"]] if "Index Name" in plan else []
+    for child in plan.get("Plans", []):
+        found.extend(_find_index_names(child))
+    return found
+
+
+def _find_seq_scans(plan: dict, relation: str) -> List[str]:
+    """Nós Seq Scan sobre `relation` em qualquer nível do plano"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") == relation:
+        found.append(plan.get("Filter", "(sem filtro)"))
+    for child in plan.get("Plans", []):
+        found.extend(_find_seq_scans(child, relation))
+    return found
+
+
+async def _seed(engine) -> dict:
+    """Dados sintéticos com a forma da produção: sites, sources, tópicos e itens ao longo de um ano"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+
+    topics = []
+    for index in range(SEED_MAIN_TOPICS):
+        main_id = str(uuid4())
+        topics.append({"id": main_id, "name": f"Tópico {index}", "parent_topic_id": None})
+        for sub in range(SEED_SUBTOPICS_PER_TOPIC):
+            topics.append({"id": str(uuid4()), "name": f"Subtópico {index}.{sub}", "parent_topic_id": main_id})
+    subtopics = [topic for topic in topics if topic["parent_topic_id"]]
+    names = {topic["id"]: topic["name"] for topic in topics}
+
+    sources = [
+        {
+            "id": str(uuid4()),
+            "name": f"Source {index}",
+            "url": f"https://site{index % SEED_SITES}.example/feed{index}.xml",
+            "site_name": f"site{index % SEED_SITES}.example",
+            "is_active": True,
+            "total_items": 0
+        }
+        for index in range(SEED_SOURCES)
+    ]
+
+    items = []
+    for index in range(SEED_ITEMS):
+        source = rng.choice(sources)
+        created_at = now - timedelta(seconds=rng.uniform(0, SEED_DAYS * 86400))
+        categorized = rng.random() < 0.9
+        subtopic = rng.choice(subtopics)
+        source["total_items"] += 1
+        items.append({
+            "id": str(uuid4()),
+            "source_id": source["id"],
+            "title": f"Item {index}",
+            "url": f"https://{source['site_name']}/item/{index}",
+            "guid": f"guid-{index}",
+            "published_at": created_at - timedelta(minutes=rng.randint(0, 600)) if rng.random() < 0.95 else None,
+            "created_at": created_at,
+            "updated_at": created_at,
+            "cluster_id": f"cluster-{index // 3}" if rng.random() < 0.2 else None,
+            "ai_topic": names[subtopic["parent_topic_id"]] if categorized else None,
+            "ai_subtopic": subtopic["name"] if categorized else None,
+            "ai_sentiment": rng.choice(SENTIMENTS) if categorized else None,
+            "ai_importance_score": round(rng.random(), 3) if categorized else None,
+            "ai_processing_status": "completed" if categorized else "pending",
+            "ai_attempts": 1 if categorized else 0,
+            "is_read": rng.random() < 0.3,
+            "is_bookmarked": rng.random() < 0.01
+        })
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(pg_insert(Topic), [{**topic, "item_count": 0, "is_ai_generated": True} for topic in topics])
+        await db.execute(pg_insert(RSSSource), sources)
+        for start in range(0, len(items), 5000):
+            await db.execute(pg_insert(RSSItem), items[start:start + 5000])
+        for column in (RSSItem.ai_topic, RSSItem.ai_subtopic):
+            counts = select(column, func.count(RSSItem.id).label("total")).group_by(column).subquery()
+            await db.execute(
+                Topic.__table__.update()
+                .where(Topic.name == counts.c[column.key])
+                .values(item_count=counts.c.total)
+            )
+        from services.topic_stats import rebuild_topic_stats
+        await rebuild_topic_stats(db)
+        await db.commit()
+
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE"))
+
+    return {
+        "topic_id": topics[0]["id"],
+        "subtopic_id": subtopics[0]["id"],
+        "site": sources[0]["site_name"],
+        "source_id": sources[0]["id"]
+    }
+
+
+async def _prepare(engine) -> dict:
+    async with engine.begin() as conn:
+        await conn.run_sync(_run_migrations)
+    async with AsyncSessionLocal() as db:
+        if await db.scalar(select(RSSSource.id).limit(1)) is not None:
+            pytest.fail("o banco de TEST_DATABASE_URL já tem dados; use um banco descartável")
+    return await _seed(engine)
+
+
+async def _cleanup(engine):
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "TRUNCATE rss_items, rss_sources, topics, topic_stats, ai_categorization_cache CASCADE"
+        ))
+    await engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def seeded_engine():
+    """Banco semeado uma vez para todos os endpoints; o app usa o mesmo engine via AsyncSessionLocal"""
+    # NullPool: cada teste roda no seu próprio event loop (asyncio.run)
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    AsyncSessionLocal.configure(bind=engine)
+    try:
+        seed = asyncio.run(_prepare(engine))
+        yield engine, seed
+    finally:
+        asyncio.run(_cleanup(engine))
+        AsyncSessionLocal.configure(bind=database.engine)
+
+
+async def _explain(engine, path: str, seed: dict) -> Tuple[int, List[dict]]:
+    """(status HTTP, planos das consultas executadas pelo endpoint)"""
+    import httpx
+    from main import app
+
+    captured: List[Tuple[str, object]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            captured.append((statement, parameters))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://plans") as client:
+        cursor = ""
+        if "{cursor}" in path:
+            cursor = (await client.get("/api/feeds/timeline?limit=50")).headers.get("X-Next-Cursor", "")
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            response = await client.get(path.format(cursor=cursor, **seed))
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    plans = []
+    async with engine.connect() as conn:
+        for statement, parameters in captured:
+            result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = result.scalar()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            plans.append(plan[0]["Plan"])
+    return response.status_code, plans
+
+
+@pytest.mark.parametrize("path,allow_seq_scan", ENDPOINTS, ids=[path for path, _ in ENDPOINTS])
+def test_router_queries_use_indexes(seeded_engine, path, allow_seq_scan):
+    engine, seed = seeded_engine
+    status, plans = asyncio.run(_explain(engine, path, seed))
+    scans = [scan for plan in plans for scan in _find_seq_scans(plan, RSSItem.__tablename__)]
+
+    assert status == 200
+    assert plans
+    if not allow_seq_scan:
+        assert not scans, f"Seq Scan em rss_items: {'; '.join(scans)}"
+
+
+def test_common_search_term_walks_recency_index(seeded_engine):
+    """"item" está em todos os títulos: os candidatos saem de ix_rss_items_recency, sem ordenar todos os resultados"""
+    engine, seed = seeded_engine
+    status, plans = asyncio.run(_explain(engine, "/api/feeds/search?q=item", seed))
+
+    assert status == 200
+    assert "ix_rss_items_recency" in [name for plan in plans for name in _find_index_names(plan)]
+
+
+async def _importance_order_edges() -> Tuple[Optional[float], List[Optional[float]]]:
+    from services.pagination import IMPORTANCE_KEYSET
+
+    ordered = select(RSSItem.ai_importance_score).order_by(*IMPORTANCE_KEYSET.order_by())
+    async with AsyncSessionLocal() as db:
+        categorized = await db.scalar(select(func.count(RSSItem.ai_importance_score)))
+        first = await db.scalar(ordered.limit(1))
+        after = (await db.execute(ordered.offset(categorized - 1).limit(2))).scalars().all()
+    return first, after
+
+
+def test_importance_order_puts_uncategorized_items_last(seeded_engine):
+    """Itens sem ai_importance_score vêm depois de todos os categorizados (no banco, não só no cursor)"""
+    first, after = asyncio.run(_importance_order_edges())
+
+    assert first is not None
+    assert after[0] is not None and after[1] is None
@@ -0,0 +1,21 @@
+import pytest
+from services.startup import LAZY_MODULES, STARTUP_IMPORT_BUDGET, measure_imports
+
+
+@pytest.fixture(scope="module")
+def cold_start():
+    """`import main` num interpretador novo (imports frios, sem o cache deste processo)"""
+    return measure_imports("main")
+
+
+def test_cold_start_within_budget(cold_start):
+    elapsed, _ = cold_start
+    assert elapsed <= STARTUP_IMPORT_BUDGET, (
+        f"cold start de {elapsed:.3f}s excede o orçamento de {STARTUP_IMPORT_BUDGET:.3f}s"
+    )
+
+
+def test_heavy_modules_stay_lazy(cold_start):
+    _, modules = cold_start
+    loaded = sorted({name.split(".")[0] for name, _, _ in modules} & set(LAZY_MODULES))
+    assert not loaded, f"módulos pesados importados na inicialização: {', '.join(loaded)}"
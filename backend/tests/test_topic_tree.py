@@ -0,0 +1,135 @@
+import os
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from routers.feeds import get_feeds_by_topics
+from routers.topics import get_topic_hierarchy
+from services.topic_tree import build_topic_tree
+
+# Tempo máximo (segundos) para montar as respostas de /by-topics e /hierarchy com 50k tópicos
+# (árvore + modelos pydantic dos routers; ~0,6s numa máquina de desenvolvimento)
+TOPIC_TREE_BUDGET = float(os.getenv("TOPIC_TREE_BUDGET", "2.0"))
+TOPIC_TREE_SIZE = 50000
+
+# Medições de tempo dependem da máquina: só rodam com RUN_BENCHMARKS=1
+benchmark = pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="benchmark (defina RUN_BENCHMARKS=1)")
+
+
+def _topic(id, parent_topic_id=None, item_count=1):
+    return SimpleNamespace(
+        id=id, name=f"Tópico {id}", description=None, parent_topic_id=parent_topic_id,
+        color=None, icon=None, item_count=item_count
+    )
+
+
+def _synthetic_topics(count):
+    """Três níveis: uma raiz a cada 100 tópicos, um filho a cada 10, netos no resto"""
+    topics = []
+    for index in range(count):
+        if index % 100 == 0:
+            parent = None
+        elif index % 10 == 0:
+            parent = topics[index - index % 100].id
+        else:
+            parent = topics[index - index % 10].id
+        topics.append(_topic(str(uuid4()), parent, index % 7))
+    return topics
+
+
+class _FakeSession:
+    """Só o necessário para `(await db.execute(...)).scalars().all()` nos routers"""
+
+    def __init__(self, topics):
+        self.topics = topics
+        self.executed = 0
+
+    async def execute(self, statement):
+        self.executed += 1
+        return self
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.topics
+
+
+def _make_node(topic, children):
+    return (topic.id, children)
+
+
+def test_build_topic_tree_keeps_order_and_prunes():
+    topics = [
+        _topic("b"), _topic("a"),
+        _topic("b1", "b"), _topic("a1", "a", item_count=0), _topic("a2", "a"),
+        _topic("a1x", "a1"), _topic("orphan", "missing")
+    ]
+    assert build_topic_tree(topics, _make_node) == [
+        ("b", [("b1", [])]),
+        ("a", [("a1", [("a1x", [])]), ("a2", [])]),
+    ]
+    assert build_topic_tree(topics, _make_node, include=lambda topic: topic.item_count > 0) == [
+        ("b", [("b1", [])]),
+        ("a", [("a2", [])]),
+    ]
+
+
+def test_build_topic_tree_ignores_cycles():
+    topics = [_topic("root"), _topic("x", "y"), _topic("y", "x")]
+    assert build_topic_tree(topics, _make_node) == [("root", [])]
+
+
+def test_build_topic_tree_visits_each_topic_once():
+    """Uma passada: `include` e `make_node` uma vez por tópico, qualquer que seja a profundidade"""
+    topics = _synthetic_topics(TOPIC_TREE_SIZE)
+    included, made = [], []
+
+    def include(topic):
+        included.append(topic.id)
+        return True
+
+    def make_node(topic, children):
+        made.append(topic.id)
+        return _make_node(topic, children)
+
+    tree = build_topic_tree(topics, make_node, include=include)
+
+    assert len(tree) == TOPIC_TREE_SIZE // 100
+    assert len(included) == len(made) == TOPIC_TREE_SIZE
+    assert len(set(made)) == TOPIC_TREE_SIZE
+
+
+ENDPOINTS = [
+    lambda db: get_feeds_by_topics(include_empty=True, db=db),
+    lambda db: get_topic_hierarchy(db=db),
+]
+ENDPOINT_IDS = ["by-topics", "hierarchy"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("endpoint", ENDPOINTS, ids=ENDPOINT_IDS)
+async def test_topic_tree_endpoints_run_one_query(endpoint):
+    """Sem N+1: a árvore inteira sai de uma única consulta"""
+    db = _FakeSession(_synthetic_topics(TOPIC_TREE_SIZE))
+    tree = await endpoint(db)
+
+    assert len(tree) == TOPIC_TREE_SIZE // 100
+    assert db.executed == 1
+
+
+@benchmark
+@pytest.mark.asyncio
+@pytest.mark.parametrize("endpoint", ENDPOINTS, ids=ENDPOINT_IDS)
+async def test_topic_tree_endpoints_within_budget(endpoint):
+    topics = _synthetic_topics(TOPIC_TREE_SIZE)
+
+    started = time.perf_counter()
+    tree = await endpoint(_FakeSession(topics))
+    elapsed = time.perf_counter() - started
+
+    assert len(tree) == TOPIC_TREE_SIZE // 100
+    assert elapsed <= TOPIC_TREE_BUDGET, (
+        f"{elapsed:.3f}s para {TOPIC_TREE_SIZE} tópicos excede o orçamento de {TOPIC_TREE_BUDGET:.3f}s"
+    )